@@ -1,182 +1,112 @@
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
 
-# Load the dataset
-file_path = 'potato_data.xlsx'
-df = pd.read_excel(file_path)
-
-# Clean the data
-df.columns = df.columns.str.strip()
-df.dropna(how='all', inplace=True)
-
-# Rename columns to remove '_price'
-df.rename(columns=lambda x: x.replace('_Price', ''), inplace=True)
+from cost_optimizer import charts
+from cost_optimizer.core import compare_plants, insight_markdown, lot_costs
+from cost_optimizer.cube import CostCube
+from cost_optimizer.loader import load_cost_cube
+from cost_optimizer.schema import DEFAULT_PLANT, plant_schema
+from cost_optimizer.shared import SharedDataset
+from cost_optimizer.ui import fragment, profile_panel, stage_profiler
 
 # Streamlit dashboard
 st.set_page_config(layout="wide")
+
+# Opt-in per-stage timings of this rerun (COST_OPTIMIZER_PROFILE=1 or ?profile=1)
+timer = stage_profiler('Potato_cost.py')
+
+# Load the dataset (cleaned once, re-parsed only when the file changes). Every
+# session reads the same memory-mapped snapshot and its BU -> Season -> Region ->
+# Potato index; a changed file is swapped in as a new snapshot.
+@st.cache_resource
+def shared_dataset(path, kind):
+    return SharedDataset(path, kind)
+
+file_path = 'potato_data.xlsx'
+with timer.stage('load_data'):
+    snapshot = shared_dataset(file_path, 'potato_data').current()
+df, index, load_info = snapshot.frame, snapshot.index, snapshot.info
+
+# BU x Season x Region x Plant cost cube, computed once per data version
+@st.cache_resource
+def load_cube(path, key):
+    cube_frame, _ = load_cost_cube(path, 'potato_data')
+    return CostCube(cube_frame)
+
+with timer.stage('load_cube'):
+    cube = load_cube(file_path, snapshot.key)
+
+# Plants found in the workbook's headers, in column order
+plants = list(plant_schema(df).plants)
+
+# Figures are memoized per data version and selection, so reruns reuse them
+@st.cache_resource(max_entries=256)
+def lot_charts(path, key, selection):
+    costs = lot_costs(index.select(*selection), plants)
+    return charts.cost_flow_sankey(costs), charts.plant_price_bar(costs)
+
+@st.cache_resource(max_entries=64)
+def regional_chart(path, key, bu):
+    regions, avg_costs = cube.regional_averages(bu)
+    return charts.regional_average_bar(regions, avg_costs)
+
+# Changing the plant only reruns this section; the charts below stay as they are
+@fragment
+@timer.section('analysis_section')
+def analysis_section(selection):
+    selected_bu = selection[0]
+    filtered_df = index.select(*selection)
+    selected_plant = st.selectbox('Select Plant', plants, index=plants.index(DEFAULT_PLANT) if DEFAULT_PLANT in plants else 0)
+
+    # Determine the destination plant with the least cost
+    with timer.stage('compare_plants'):
+        comparison = compare_plants(filtered_df, selected_plant, plants)
+    destination_plant = comparison.destination_plant
+
+    # Resultant output table
+    with timer.stage('summary_table'):
+        result_table = pd.DataFrame({
+            'BU': [selected_bu],
+            'Plant to move': [selected_plant],
+            'Destination Plant': [destination_plant],
+            'Difference in Cost': [comparison.cost_difference] if destination_plant else 'N/A'
+        })
+
+        st.subheader("Cost Analysis Summary")
+        st.write(result_table.to_html(index=False, border=0, classes='table table-striped'), unsafe_allow_html=True)
+
+    # Add space between the table and the insight text
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # Detailed text insight with markdown
+    with timer.stage('insight_text'):
+        st.markdown(insight_markdown(selected_bu, comparison))
+
 st.title("Agro Dashboard")
 
 # Sidebar filters
 st.sidebar.header("Select filters")
-selected_bu = st.sidebar.selectbox('Select Business Unit (BU)', df['BU'].unique())
-filtered_df_by_bu = df[df['BU'] == selected_bu]
-selected_season = st.sidebar.selectbox('Select Season', filtered_df_by_bu['Season'].unique())
-selected_region = st.sidebar.selectbox('Select Region', filtered_df_by_bu['Region'].unique())
-filtered_df_by_season_and_region = filtered_df_by_bu[(filtered_df_by_bu['Season'] == selected_season) & 
-                                                     (filtered_df_by_bu['Region'] == selected_region)]
-selected_potato = st.sidebar.selectbox('Select Potato', filtered_df_by_season_and_region['Potato'].unique())
-selected_plant = st.sidebar.selectbox('Select Plant', ['Pune', 'Channo', 'Kolkata', 'UP'], index=0)
+st.sidebar.caption(load_info.summary())
+with timer.stage('filters'):
+    selected_bu = st.sidebar.selectbox('Select Business Unit (BU)', index.options())
+    selected_season = st.sidebar.selectbox('Select Season', index.options(selected_bu))
+    selected_region = st.sidebar.selectbox('Select Region', index.options(selected_bu, selected_season))
+    selected_potato = st.sidebar.selectbox('Select Potato', index.options(selected_bu, selected_season, selected_region))
 
 # Filter data based on selections
-filtered_df = filtered_df_by_season_and_region[filtered_df_by_season_and_region['Potato'] == selected_potato]
-
-# Determine the destination plant with the least cost
-cost_columns = ['Channo', 'Pune', 'Kolkata', 'UP']
-costs = filtered_df[cost_columns].values.flatten()
-min_cost = min(costs)
-
-# Find all plants with the minimum cost
-min_cost_plants = [cost_columns[i] for i, cost in enumerate(costs) if cost == min_cost]
-
-if len(min_cost_plants) == 1:
-    destination_plant = min_cost_plants[0]
-else:
-    destination_plant = None
-
-selected_plant_cost = round(filtered_df[selected_plant].values[0])
-if destination_plant:
-    destination_plant_cost = round(filtered_df[destination_plant].values[0])
-    cost_difference = int(round(selected_plant_cost - destination_plant_cost))
-else:
-    destination_plant_cost = None
-    cost_difference = None
-
-# Breakdown costs
-buying_rate = round(filtered_df['Buying Rate $/Ton'].values[0])
-plant_loss = round(filtered_df['Plant Loss $/Ton'].values[0])
-cold_store_loss = round(filtered_df['Cold Store Loss $/Ton'].values[0])
-leno_bag_and_others = round(filtered_df['Leno Bag and Others $/Ton'].values[0])
-transportation_cost_selected = round(filtered_df[f'Transportation cost {selected_plant}'].values[0])
-if destination_plant:
-    transportation_cost_destination = round(filtered_df[f'Transportation cost {destination_plant}'].values[0])
-else:
-    transportation_cost_destination = None
-
-# Resultant output table
-result_table = pd.DataFrame({
-    'BU': [selected_bu],
-    'Plant to move': [selected_plant],
-    'Destination Plant': [destination_plant],
-    'Difference in Cost': [cost_difference] if destination_plant else 'N/A'
-})
-
-st.subheader("Cost Analysis Summary")
-st.write(result_table.to_html(index=False, border=0, classes='table table-striped'), unsafe_allow_html=True)
-
-# Add space between the table and the insight text
-st.markdown("<br>", unsafe_allow_html=True)
-
-# Detailed text insight with markdown
-if destination_plant is None:
-    insight_text = f"""
-    **Cost Analysis and Optimization Suggestion**
-
-    All plants have the same cost for the selected potato. Therefore, there is no specific plant that stands out as the lowest-cost option.
-    
-    The cost for the selected plant **{selected_plant}** and other plants is uniformly **${selected_plant_cost}/ton**.
-    
-    **Summary:**\n
-    Since all plants have the same cost, cost optimization is not applicable in this scenario. You can consider other factors such as logistical aspects or production capacities for making a decision.
-
-    **Recommendation:**\n
-    Given the uniformity in cost, you may continue with the selected plant or choose based on other strategic factors, as no cost savings are identified in the current analysis.
-    """
-elif selected_plant == destination_plant:
-    insight_text = f"""
-    **Cost Analysis and Optimization Suggestion**
-
-    You have selected **{selected_plant}**, which is currently the lowest-cost option among the available plants. 
-    The total cost for **{selected_plant}** is **${selected_plant_cost}/ton**, which is lower compared to other plants.
-    Therefore, no further cost optimization is possible with the given data.
-    """
-else:
-    insight_text = f"""
-    **Cost Analysis and Optimization Suggestion**
-
-    By relocating production from **{selected_plant}** to **{destination_plant}**, the estimated cost savings are **${cost_difference}/ton**.
-
-    The breakdown of costs at **{selected_plant}** includes:
-    - Buying rate: **${buying_rate}**/ton
-    - Plant loss: **${plant_loss}**/ton
-    - Cold store loss: **${cold_store_loss}**/ton
-    - Leno bag and others: **${leno_bag_and_others}**/ton
-    - Transportation cost: **${transportation_cost_selected}**/ton
-    - Total consumption cost at **{selected_plant}**: **${selected_plant_cost}/ton**
-    
-    Total consumption cost at **{destination_plant}**: **${destination_plant_cost}/ton**
-    
-    At **{destination_plant}**, the transportation cost is **${transportation_cost_destination}**/ton which is comparatively lower than the transportation cost of **{selected_plant}**.
-    
-    This comprehensive cost analysis highlights the potential savings by considering all aspects of production and transportation costs. In the Business Unit (BU) of **{selected_bu}**, relocating operations from **{selected_plant}** to **{destination_plant}** could lead to significant savings. The savings in cost will amount to the difference between the total costs at these two plants, considering factors like buying rate, plant loss, cold store loss, leno bag and other costs, and transportation cost.
-
-    **Final Summary:**
-    Based on the analysis, it is suggested to move the plant from **{selected_plant}** to **{destination_plant}** to achieve a cost savings of **${cost_difference}**/ton. This decision is derived from the detailed cost breakdown and comparison of total costs, ensuring a more cost-effective production process.
-
-    Please note that this analysis is based on the provided data and theoretical assumptions. In a real-world scenario, additional factors such as infrastructure, labor costs, regulations, and other variables need to be considered for a comprehensive analysis and accurate predictions regarding plant relocation.
-    """
-
-st.markdown(insight_text)
-
-# Improved flow diagram with shades of blue
-flow_labels = ['Consumption Cost', 'Channo Plant', 'Pune Plant', 'Kolkata Plant', 'UP Plant']
-flow_values = [filtered_df['Channo'].values[0], filtered_df['Pune'].values[0], 
-               filtered_df['Kolkata'].values[0], filtered_df['UP'].values[0]]
-
-flow_sources = [0, 0, 0, 0]
-flow_targets = [1, 2, 3, 4]
-
-colors = ['#A3C2E2', '#7EB0E8', '#4A90E2', '#0033A0']
-
-flow_sankey = go.Figure(data=[go.Sankey(
-    node=dict(
-        pad=15,
-        thickness=20,
-        line=dict(color="black", width=0.5),
-        label=flow_labels,
-        color="blue"
-    ),
-    link=dict(
-        source=flow_sources,
-        target=flow_targets,
-        value=flow_values,
-        color=colors
-    )
-)])
-
-flow_sankey.update_layout(title_text="Potato Cost Flow Analysis", font_size=10)
-st.plotly_chart(flow_sankey)
-
-# Bar chart for potato prices
-bar_fig = go.Figure()
-for plant in cost_columns:
-    bar_fig.add_trace(go.Bar(
-        x=[plant],
-        y=[filtered_df[plant].values[0]],
-        name=plant
-    ))
-
-bar_fig.update_layout(title_text="Potato Prices per Plant", xaxis_title="Plant", yaxis_title="Price")
-st.plotly_chart(bar_fig)
+selection = (selected_bu, selected_season, selected_region, selected_potato)
+analysis_section(selection)
 
-# Similar visualization to the provided image
-regions = filtered_df_by_bu['Region'].unique()
-avg_costs = [filtered_df_by_bu[filtered_df_by_bu['Region'] == region][cost_columns].mean().mean() for region in regions]
+with timer.stage('lot_charts'):
+    sankey_fig, bar_fig = lot_charts(file_path, snapshot.key, selection)
+with timer.stage('plotly_chart.lot'):
+    st.plotly_chart(sankey_fig)
+    st.plotly_chart(bar_fig)
 
-similar_fig = go.Figure(data=[
-    go.Bar(name='Selected Region', x=regions, y=avg_costs)
-])
+# Similar visualization to the provided image
+with timer.stage('regional_chart'):
+    regional_fig = regional_chart(file_path, snapshot.key, selected_bu)
+with timer.stage('plotly_chart.regional'):
+    st.plotly_chart(regional_fig)
 
-similar_fig.update_layout(barmode='group', title_text="Average Cost per Ton in Different Regions", 
-                          xaxis_title="Region", yaxis_title="Average Cost per Ton")
-st.plotly_chart(similar_fig)
+profile_panel(timer)
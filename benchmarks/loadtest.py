@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+from cost_optimizer.service import DEFAULT_PORT, PARAMS
+
+ENDPOINTS = ('recommend', 'bulk', 'breakdown')
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, target, body=b''):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = (f"{method} {target} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def lots(client, prefix=()):
+    # Walk /options down the BU -> Season -> Region -> Potato hierarchy
+    if len(prefix) == len(PARAMS):
+        return [prefix]
+    _, body = await client.request('GET', '/options?' + urlencode(dict(zip(PARAMS, prefix))))
+    found = []
+    for option in json.loads(body)['options']:
+        found.extend(await lots(client, prefix + (option,)))
+    return found
+
+
+def target(endpoint, lot, rng):
+    if endpoint == 'recommend':
+        return 'GET', '/recommend?' + urlencode(dict(zip(PARAMS, lot))), b''
+    if endpoint == 'breakdown':
+        return 'GET', '/breakdown?' + urlencode(dict(zip(PARAMS, lot[:rng.randint(1, len(lot))]))), b''
+    body = json.dumps({'lots': [dict(zip(PARAMS, lot))]}).encode()
+    return 'POST', '/recommend/bulk', body
+
+
+async def worker(host, port, requests, all_lots, endpoints, latencies, errors, seed):
+    rng = random.Random(seed)
+    client = Client(host, port)
+    try:
+        for _ in range(requests):
+            method, path, body = target(rng.choice(endpoints), rng.choice(all_lots), rng)
+            start = time.perf_counter()
+            status, _ = await client.request(method, path, body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        client.close()
+
+
+async def load_test(host, port, connections, requests, endpoints, seed):
+    client = Client(host, port)
+    all_lots = await lots(client)
+    _, before = await client.request('GET', '/stats')
+
+    latencies = []
+    errors = []
+    per_connection = max(requests // connections, 1)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(host, port, per_connection, all_lots, endpoints, latencies, errors, seed + i)
+                           for i in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    _, after = await client.request('GET', '/stats')
+    client.close()
+    before, after = json.loads(before), json.loads(after)
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    batches = after['batches'] - before['batches']
+    return {
+        'lots': len(all_lots),
+        'connections': connections,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': cuts[49] * 1000,
+        'p95_ms': cuts[94] * 1000,
+        'p99_ms': cuts[98] * 1000,
+        'cache_hits': after['cache_hits'] - before['cache_hits'],
+        'batches': batches,
+        'mean_batch_size': (after['batched_lots'] - before['batched_lots']) / batches if batches else 0.0,
+    }
+
+
+async def wait_for_server(host, port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the cost optimizer HTTP API.")
+    parser.add_argument('--url', default=f'http://127.0.0.1:{DEFAULT_PORT}')
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=5_000, help="total requests across all connections")
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=['recommend'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start-server', metavar='DATA', help="start a local service on DATA for the test")
+    parser.add_argument('--server-args', default='', help="extra arguments for the started service, e.g. '--cache-size 0'")
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    server = None
+    if args.start_server:
+        server = subprocess.Popen([sys.executable, '-m', 'cost_optimizer.service', args.start_server,
+                                   '--host', host, '--port', str(port)] + args.server_args.split(),
+                                  cwd=os.getcwd())
+    try:
+        asyncio.run(wait_for_server(host, port))
+        report = asyncio.run(load_test(host, port, args.connections, args.requests, args.endpoints, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(report, indent=2))
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate, logistics_edges, plant_names, write
+from cost_optimizer import charts
+from cost_optimizer.batch import recommend
+from cost_optimizer.core import compare_plants, sankey_data
+from cost_optimizer.cube import build_cube
+from cost_optimizer.hierarchy import HierarchyIndex
+from cost_optimizer.loader import CACHE_DIR_ENV, load_potato_data, load_sales_data
+from cost_optimizer.logistics import LogisticsGraph, apply_transport_costs
+from cost_optimizer.streaming import aggregate_csv
+
+# openpyxl is far too slow (and Excel too small) for multi-million row workbooks
+DEFAULT_EXCEL_MAX_ROWS = 20_000
+
+
+def measure(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def mask_filters(df, bu, season, region, potato):
+    # The cascading filters as the dashboards originally ran them: one full scan per level
+    seasons = df[df['BU'] == bu]['Season'].unique()
+    regions = df[(df['BU'] == bu) & (df['Season'] == season)]['Region'].unique()
+    potatoes = df[(df['BU'] == bu) & (df['Season'] == season) & (df['Region'] == region)]['Potato'].unique()
+    filtered = df[(df['BU'] == bu) & (df['Season'] == season) & (df['Region'] == region) & (df['Potato'] == potato)]
+    return seasons, regions, potatoes, filtered
+
+
+def index_filters(index, bu, season, region, potato):
+    return (index.options(bu), index.options(bu, season), index.options(bu, season, region),
+            index.select(bu, season, region, potato))
+
+
+def load_cold(loader, path, cache_dir):
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    return loader(path)
+
+
+def graph_edit(graph, edges, rng, regions, plant_nodes):
+    # Re-price one random lane, then read every region's cost to every plant again
+    source, target, cost = edges[rng.integers(len(edges))]
+    graph.set_edge(source, target, cost * rng.uniform(0.5, 2.0))
+    return graph.cost_matrix(regions, plant_nodes)
+
+
+def cases(workdir, rows, args, wanted):
+    plants = plant_names(args.plants)
+    cache_dir = os.path.join(workdir, 'cache')
+    os.environ[CACHE_DIR_ENV] = cache_dir
+
+    sales = generate(rows, args.bus, args.regions, args.potatoes, args.plants, layout='sales', seed=args.seed)
+    csv_path = os.path.join(workdir, f'sales_{rows}.csv')
+    if wanted('load.csv'):
+        write(sales, csv_path)
+
+    # Writing the workbook is slow, so only do it when an Excel case runs
+    excel_rows = min(rows, args.excel_max_rows)
+    xlsx_path = os.path.join(workdir, f'potato_data_{excel_rows}.xlsx')
+    if wanted('load.excel'):
+        workbook = generate(excel_rows, args.bus, args.regions, args.potatoes, args.plants, layout='workbook',
+                            seed=args.seed)
+        write(workbook, xlsx_path)
+
+    selection = tuple(sales.loc[0, ['BU', 'Season', 'Region', 'Potato']])
+    index = HierarchyIndex(sales)
+    lot = index.select(*selection)
+    nodes, links = sankey_data(lot, plants, *selection)
+    sankey_fig = charts.sankey_figure(nodes, links)
+    bar_fig = charts.plant_price_bar({plant: lot[f'Consumption_Cost_{plant}'].mean() for plant in plants})
+
+    yield 'load.csv.pandas', rows, lambda: pd.read_csv(csv_path)
+    yield 'load.csv.cold', rows, lambda: load_cold(load_sales_data, csv_path, cache_dir)
+    yield 'load.csv.warm', rows, lambda: load_sales_data(csv_path)
+    yield 'load.excel.pandas', excel_rows, lambda: pd.read_excel(xlsx_path)
+    yield 'load.excel.cold', excel_rows, lambda: load_cold(load_potato_data, xlsx_path, cache_dir)
+    yield 'load.excel.warm', excel_rows, lambda: load_potato_data(xlsx_path)
+    yield 'load.csv.stream_aggregate', rows, lambda: aggregate_csv(csv_path)
+    yield 'filter.mask', rows, lambda: mask_filters(sales, *selection)
+    yield 'filter.index.build', rows, lambda: HierarchyIndex(sales)
+    yield 'filter.index.lookup', rows, lambda: index_filters(index, *selection)
+    yield 'optimize.batch', rows, lambda: recommend(sales, plants)
+    yield 'optimize.single_lot', len(lot), lambda: compare_plants(lot, plants[0], plants)
+    yield 'cube.build', rows, lambda: build_cube(sales, plants)
+    yield 'sankey.data', len(lot), lambda: sankey_data(lot, plants, *selection)
+    yield 'sankey.figure', len(nodes), lambda: charts.sankey_figure(nodes, links)
+    yield 'plotly.serialize.sankey', len(nodes), lambda: sankey_fig.to_json()
+    yield 'plotly.serialize.bar', len(plants), lambda: bar_fig.to_json()
+
+    edges = logistics_edges(args.regions, args.plants, n_edges=args.graph_edges, seed=args.seed)
+    graph = LogisticsGraph.from_frame(edges)
+    edge_list = list(edges.itertuples(index=False, name=None))
+    regions = list(sales['Region'].unique())
+    plant_nodes = [f'{plant} Plant' for plant in plants]
+    rng = np.random.default_rng(args.seed)
+    yield 'logistics.build', len(edges), lambda: LogisticsGraph.from_frame(edges).cost_matrix(regions, plant_nodes)
+    yield 'logistics.edit', len(edges), lambda: graph_edit(graph, edge_list, rng, regions, plant_nodes)
+    yield 'logistics.apply', rows, lambda: apply_transport_costs(sales, graph, plants)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    def wanted(name):
+        # True if the case (or any case under this name prefix) was selected with --only
+        return not args.only or any(name.startswith(prefix) or prefix.startswith(name) for prefix in args.only)
+
+    results = []
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            for name, size, func in cases(workdir, rows, args, wanted):
+                if not wanted(name):
+                    continue
+                samples = measure(func, args.repeats)
+                results.append({
+                    'name': name,
+                    'dataset_rows': rows,
+                    'input_size': size,
+                    'repeats': args.repeats,
+                    'median_s': statistics.median(samples),
+                    'min_s': min(samples),
+                    'max_s': max(samples),
+                })
+                print(f"{name:<28} rows={rows:<10} median={results[-1]['median_s'] * 1000:10.2f} ms", file=sys.stderr)
+
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+        },
+        'config': {
+            'rows': args.rows, 'bus': args.bus, 'regions': args.regions, 'potatoes': args.potatoes,
+            'plants': args.plants, 'repeats': args.repeats, 'excel_max_rows': args.excel_max_rows, 'seed': args.seed,
+            'graph_edges': args.graph_edges,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    # Cases that got slower than threshold x the baseline median
+    previous = {(r['name'], r['dataset_rows']): r['median_s'] for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        before = previous.get((result['name'], result['dataset_rows']))
+        if before and result['median_s'] > before * threshold:
+            regressions.append((result['name'], result['dataset_rows'], before, result['median_s']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load, filter, optimize and render paths on synthetic data.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000], help="dataset sizes to run")
+    parser.add_argument('--bus', type=int, default=2)
+    parser.add_argument('--regions', type=int, default=18)
+    parser.add_argument('--potatoes', type=int, default=4, help="varieties per region")
+    parser.add_argument('--plants', type=int, default=4)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--excel-max-rows', type=int, default=DEFAULT_EXCEL_MAX_ROWS)
+    parser.add_argument('--graph-edges', type=int, default=40_000, help="hub-to-hub edges in the logistics graph")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', help="run only cases whose name starts with one of these prefixes")
+    parser.add_argument('-o', '--output', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--compare', help="baseline JSON report to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for name, rows, before, after in regressions:
+            print(f"REGRESSION {name} rows={rows}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import argparse
+import gc
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import generate, write
+from cost_optimizer.core import plant_costs
+from cost_optimizer.instrument import rss_bytes
+from cost_optimizer.loader import CACHE_DIR_ENV, load_sales_data
+from cost_optimizer.schema import plant_schema
+from cost_optimizer.shared import SharedDataset
+
+MODES = ('shared', 'copy')
+
+
+def session_view(frame, index):
+    # What a session holds during a rerun: the dataset plus a filtered slice
+    selection = index.options()[0], index.options(index.options()[0])[0]
+    filtered = index.select(*selection)
+    return frame, filtered, plant_costs(filtered, plant_schema(filtered).plants)
+
+
+def measure_mode(mode, path, sessions):
+    """RSS after each added session, in MB.
+
+    'shared' hands every session the process-wide SharedDataset snapshot;
+    'copy' unpickles a private copy per session, as st.cache_data does.
+    Every 'shared' session gets the same Python objects, so the gap shows
+    object reuse within one process, not zero-copy views across processes.
+    """
+    from cost_optimizer.hierarchy import HierarchyIndex
+
+    if mode == 'shared':
+        dataset = SharedDataset(path, 'sales')
+        dataset.current()
+
+        def open_session():
+            snapshot = dataset.current()
+            return session_view(snapshot.frame, snapshot.index)
+    else:
+        df, _ = load_sales_data(path)
+        cached = pickle.dumps(df)
+        del df
+
+        def open_session():
+            df = pickle.loads(cached)
+            return session_view(df, HierarchyIndex(df))
+
+    gc.collect()
+    baseline = rss_bytes()
+    views = []
+    samples = []
+    for _ in range(sessions):
+        views.append(open_session())
+        gc.collect()
+        samples.append((rss_bytes() - baseline) / 2**20)
+    return samples
+
+
+def run_mode(mode, path, sessions):
+    # Each mode runs in a fresh interpreter so their heaps do not mix
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.sessions', '--mode', mode, '--data', path, '--sessions', str(sessions)],
+        stdout=subprocess.PIPE, text=True, check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show dashboard memory as concurrent sessions are added.")
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--plants', type=int, default=4)
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--max-growth-mb', type=float, default=1.0,
+                        help="fail if shared sessions grow RSS by more than this per session")
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--data', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        print(json.dumps(measure_mode(args.mode, args.data, args.sessions)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ[CACHE_DIR_ENV] = os.path.join(workdir, 'cache')
+        path = os.path.join(workdir, 'sales.csv')
+        write(generate(args.rows, n_plants=args.plants), path)
+        # Build the sidecars once so both modes start from a warm cache
+        SharedDataset(path, 'sales').current()
+        results = {mode: run_mode(mode, path, args.sessions) for mode in MODES}
+
+    print(f"{'sessions':>8} " + ' '.join(f"{mode + ' MB':>10}" for mode in MODES))
+    for i in range(args.sessions):
+        print(f"{i + 1:>8} " + ' '.join(f"{results[mode][i]:>10.1f}" for mode in MODES))
+
+    growth = {mode: (samples[-1] - samples[0]) / max(len(samples) - 1, 1) for mode, samples in results.items()}
+    print(' '.join(f"{mode}: {growth[mode]:.2f} MB/session" for mode in MODES))
+    return 1 if growth['shared'] > args.max_growth_mb else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cost_optimizer.schema import COMPONENT_COLUMNS, PLANTS
+
+BUS = ['India', 'Saudi', 'Egypt', 'Thailand', 'Vietnam', 'Turkey', 'Poland', 'Mexico']
+SEASONS = ['Early Rabi', 'Rabi', 'Kharif', 'Summer']
+VARIETIES = ['FC3CF', 'FC5CF', 'FC11CF', 'LRCF', 'CSCF', 'ATLCF', 'FC12CF', 'FL2027']
+
+# The real files pad this header; keep it so column-matching code is exercised
+PADDED_TRANSPORT = {'Kolkata': 'Transportation cost Kolkata            '}
+
+
+def plant_names(n_plants):
+    return PLANTS[:n_plants] + [f'Plant{i:02d}' for i in range(len(PLANTS) + 1, n_plants + 1)]
+
+
+def generate(rows, n_bus=2, n_regions=18, n_potatoes=4, n_plants=4, n_seasons=2, layout='sales', seed=0):
+    """Synthetic lots with the potato_sales.csv (layout='sales') or potato_data.xlsx (layout='workbook') columns.
+
+    Each region grows n_potatoes varieties; every row picks a BU, season,
+    region and variety at random. Consumption cost per plant is the sum of
+    the cost components and that plant's transportation cost, as in the
+    shipped data.
+    """
+    rng = np.random.default_rng(seed)
+    plants = plant_names(n_plants)
+    bus = BUS[:n_bus] if n_bus <= len(BUS) else [f'BU{i:02d}' for i in range(n_bus)]
+    seasons = SEASONS[:n_seasons]
+    regions = [f'R{i:03d}' for i in range(n_regions)]
+    varieties = [VARIETIES[i] if i < len(VARIETIES) else f'V{i:03d}CF' for i in range(n_potatoes)]
+    potatoes = [f'{region}{variety}' for region in regions for variety in varieties]
+
+    bu_codes = rng.integers(0, len(bus), rows)
+    season_codes = rng.integers(0, len(seasons), rows)
+    region_codes = rng.integers(0, n_regions, rows)
+    potato_codes = region_codes * n_potatoes + rng.integers(0, n_potatoes, rows)
+
+    components = np.column_stack([
+        rng.uniform(150, 250, rows),
+        rng.integers(3, 10, rows).astype(float),
+        rng.integers(1, 12, rows).astype(float),
+        np.full(rows, 20.0),
+    ])
+    # Transport depends mostly on the region/plant lane, with some per-lot noise
+    lane_cost = rng.uniform(10, 60, (n_regions, n_plants))
+    transport = lane_cost[region_codes] + rng.normal(0, 2, (rows, n_plants))
+    transport = np.round(np.maximum(transport, 0), 2)
+    consumption = components.sum(axis=1, keepdims=True) + transport
+
+    df = pd.DataFrame({
+        'BU': pd.Categorical.from_codes(bu_codes, bus).astype(object),
+        'Season': pd.Categorical.from_codes(season_codes, seasons).astype(object),
+        'Region': pd.Categorical.from_codes(region_codes, regions).astype(object),
+        'Potato': pd.Categorical.from_codes(potato_codes, potatoes).astype(object),
+    })
+    for j, plant in enumerate(plants):
+        name = f'Consumption_Cost_{plant}' if layout == 'sales' else f'{plant}_Price'
+        df[name] = consumption[:, j]
+    for k, column in enumerate(COMPONENT_COLUMNS):
+        df[column] = components[:, k]
+    for j, plant in enumerate(plants):
+        df[PADDED_TRANSPORT.get(plant, f'Transportation cost {plant}')] = transport[:, j]
+    return df
+
+
+def logistics_edges(n_regions=18, n_plants=4, n_hubs=1_000, n_edges=40_000, seed=0):
+    """Synthetic From/To/Cost $/Ton edges: regions -> cold stores and hubs -> plants.
+
+    Node names match generate(): regions 'R000'.., plants '<plant> Plant'.
+    Every region and plant gets a few hub links so most lanes have a route.
+    """
+    rng = np.random.default_rng(seed)
+    regions = [f'R{i:03d}' for i in range(n_regions)]
+    plants = [f'{plant} Plant' for plant in plant_names(n_plants)]
+    hubs = np.array([f'H{i:05d}' for i in range(n_hubs)])
+
+    sources = [np.repeat(regions, 3), hubs[rng.integers(0, n_hubs, n_edges)]]
+    targets = [hubs[rng.integers(0, n_hubs, 3 * n_regions)], hubs[rng.integers(0, n_hubs, n_edges)]]
+    sources.append(hubs[rng.integers(0, n_hubs, 3 * n_plants)])
+    targets.append(np.repeat(plants, 3))
+    source = np.concatenate(sources)
+    target = np.concatenate(targets)
+    return pd.DataFrame({
+        'From': source,
+        'To': target,
+        'Cost $/Ton': np.round(rng.uniform(1, 15, len(source)), 2),
+    })
+
+
+def write(df, path):
+    if path.endswith('.xlsx'):
+        df.to_excel(path, index=False)
+    elif path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic potato cost dataset.")
+    parser.add_argument('output', help="output file (.csv, .xlsx or .parquet)")
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--bus', type=int, default=2)
+    parser.add_argument('--regions', type=int, default=18)
+    parser.add_argument('--potatoes', type=int, default=4, help="varieties per region")
+    parser.add_argument('--plants', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    layout = 'workbook' if args.output.endswith('.xlsx') else 'sales'
+    df = generate(args.rows, args.bus, args.regions, args.potatoes, args.plants, layout=layout, seed=args.seed)
+    write(df, args.output)
+    print(f"{len(df)} rows x {len(df.columns)} columns -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import importlib
+
+# Public names are resolved on first access so that importing the package
+# does not pull in pandas, numpy, plotly or streamlit.
+_EXPORTS = {
+    'LoadInfo': 'cost_optimizer.loader',
+    'load_potato_data': 'cost_optimizer.loader',
+    'load_sales_data': 'cost_optimizer.loader',
+    'load_sales_aggregates': 'cost_optimizer.loader',
+    'load_cost_cube': 'cost_optimizer.loader',
+    'CostCube': 'cost_optimizer.cube',
+    'build_cube': 'cost_optimizer.cube',
+    'aggregate_csv': 'cost_optimizer.streaming',
+    'source_key': 'cost_optimizer.loader',
+    'HierarchyIndex': 'cost_optimizer.hierarchy',
+    'SharedDataset': 'cost_optimizer.shared',
+    'Snapshot': 'cost_optimizer.shared',
+    'recommend': 'cost_optimizer.batch',
+    'CostService': 'cost_optimizer.service',
+    'LogisticsGraph': 'cost_optimizer.logistics',
+    'apply_transport_costs': 'cost_optimizer.logistics',
+    'generate_reports': 'cost_optimizer.report',
+    'Allocation': 'cost_optimizer.allocation',
+    'allocate': 'cost_optimizer.allocation',
+    'PLANTS': 'cost_optimizer.schema',
+    'PlantSchema': 'cost_optimizer.schema',
+    'plant_schema': 'cost_optimizer.schema',
+    'long_costs': 'cost_optimizer.schema',
+    'Shock': 'cost_optimizer.scenarios',
+    'ScenarioResult': 'cost_optimizer.scenarios',
+    'simulate': 'cost_optimizer.scenarios',
+    'PlantComparison': 'cost_optimizer.core',
+    'RelocationSummary': 'cost_optimizer.core',
+    'compare_plants': 'cost_optimizer.core',
+    'destination_plant': 'cost_optimizer.core',
+    'insight_markdown': 'cost_optimizer.core',
+    'plant_costs': 'cost_optimizer.core',
+    'relocation_summary': 'cost_optimizer.core',
+    'sankey_data': 'cost_optimizer.core',
+    'StageTimer': 'cost_optimizer.instrument',
+    'stage_timer': 'cost_optimizer.instrument',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,197 @@
+from dataclasses import dataclass
+
+from cost_optimizer.schema import KEY_COLUMNS, plant_columns
+
+VOLUME_COLUMN = 'Volume'
+
+
+@dataclass(frozen=True)
+class Allocation:
+    assignments: object  # DataFrame: one row per (lot, plant) with a positive volume
+    plant_load: object  # DataFrame indexed by plant: volume, capacity, cost
+    total_cost: float
+    unconstrained_cost: float
+
+    @property
+    def capacity_premium(self):
+        # Extra cost paid because the cheapest plants are full
+        return self.total_cost - self.unconstrained_cost
+
+
+def lot_volumes(df, volumes=None, volume_column=VOLUME_COLUMN):
+    import numpy as np
+
+    if volumes is None:
+        if volume_column in df.columns:
+            return df[volume_column].to_numpy(dtype=float)
+        return np.ones(len(df))
+    volumes = np.asarray(volumes, dtype=float)
+    if volumes.ndim == 0:
+        return np.full(len(df), float(volumes))
+    if len(volumes) != len(df):
+        raise ValueError(f"Got {len(volumes)} volumes for {len(df)} lots")
+    return volumes
+
+
+def plant_capacities(capacities, plants):
+    # Plants without a capacity (or with None) are unconstrained
+    import numpy as np
+
+    if capacities is None:
+        return np.full(len(plants), np.inf)
+    if not hasattr(capacities, 'get'):
+        return np.full(len(plants), float(capacities))
+    unknown = set(capacities) - set(plants)
+    if unknown:
+        raise ValueError(f"Capacities given for unknown plants: {sorted(unknown)}")
+    return np.array([np.inf if capacities.get(plant) is None else float(capacities[plant]) for plant in plants])
+
+
+def _move_costs(filled, flows, plant, move, mover, targets=None):
+    # Cheapest $/ton of moving volume off plant to each target plant (default: all), and the lot to move
+    import numpy as np
+
+    if targets is None:
+        targets = np.arange(filled.shape[1])
+    lots = np.flatnonzero(flows[:, plant] > 0)
+    if not len(lots):
+        move[plant, targets] = np.inf
+    else:
+        # Lots only ever sit on usable plants, so this never subtracts inf from inf
+        delta = filled[np.ix_(lots, targets)] - filled[lots, plant][:, None]
+        cheapest = delta.argmin(axis=0)
+        move[plant, targets] = delta[cheapest, np.arange(len(targets))]
+        mover[plant, targets] = lots[cheapest]
+    move[plant, plant] = np.inf
+
+
+def _shortest_paths(move, sources, tolerance):
+    # Bellman-Ford from every source at once over the small dense plant graph;
+    # move costs can be negative once lots have left their cheapest plant
+    import numpy as np
+
+    p = len(move)
+    dist = np.where(sources, 0.0, np.inf)
+    pred = np.full(p, -1)
+    columns = np.arange(p)
+    for _ in range(p):
+        via = dist[:, None] + move
+        best = via.argmin(axis=0)
+        candidate = via[best, columns]
+        improved = candidate < dist - tolerance
+        if not improved.any():
+            break
+        dist = np.where(improved, candidate, dist)
+        pred = np.where(improved, best, pred)
+    return dist, pred
+
+
+def solve_transportation(costs, supply, capacity):
+    """Minimum-cost assignment of lot supply to plants under plant capacity.
+
+    costs is (lots, plants) with NaN marking lanes that cannot be used.
+    Returns the (lots, plants) matrix of shipped volume.
+
+    Every lot starts at its cheapest plant. Volume over a plant's capacity is
+    then pushed along the cheapest chain of lot moves to a plant with room
+    (successive shortest paths). Only plants are graph nodes, so each step is
+    a Bellman-Ford over a plants x plants matrix whatever the number of lots.
+    """
+    import numpy as np
+
+    n, p = costs.shape
+    usable = ~np.isnan(costs)
+    if (supply > 0).any() and not usable[supply > 0].any(axis=1).all():
+        raise ValueError("Some lots have no plant with a known cost")
+    if supply.sum() > capacity.sum():
+        raise ValueError(f"Total volume {supply.sum():g} exceeds total plant capacity {capacity.sum():g}")
+
+    # Without binding capacities every lot simply goes to its cheapest plant
+    filled = np.where(usable, costs, np.inf)
+    # Column-major, since lots are looked up one plant at a time
+    flows = np.zeros((n, p), order='F')
+    if n:
+        flows[np.arange(n), filled.argmin(axis=1)] = supply
+    load = flows.sum(axis=0)
+    excess = np.maximum(load - capacity, 0.0)
+    room = np.maximum(capacity - load, 0.0)
+
+    volume_tolerance = 1e-9 * max(float(supply.max()), 1.0) if n else 0.0
+    cost_tolerance = 1e-9 * max(float(np.abs(costs[usable]).max()), 1.0) if usable.any() else 0.0
+    move = np.full((p, p), np.inf)
+    mover = np.zeros((p, p), dtype=np.intp)
+    if (excess > volume_tolerance).any():
+        for plant in range(p):
+            _move_costs(filled, flows, plant, move, mover)
+
+    while (excess > volume_tolerance).any():
+        dist, pred = _shortest_paths(move, excess > volume_tolerance, cost_tolerance)
+        reachable = np.where(room > volume_tolerance, dist, np.inf)
+        target = int(reachable.argmin())
+        if not np.isfinite(reachable[target]):
+            raise ValueError("Allocation could not be solved: no plant with spare capacity can take the excess volume")
+
+        path = [target]
+        while pred[path[-1]] >= 0 and len(path) <= p:
+            path.append(int(pred[path[-1]]))
+        path.reverse()
+        steps = [(a, b, mover[a, b]) for a, b in zip(path, path[1:])]
+
+        # As much as the source's excess, the target's room and every moved lot allow
+        amount = min([excess[path[0]], room[target]] + [flows[lot, a] for a, _, lot in steps])
+        for a, b, lot in steps:
+            arriving = flows[lot, b] == 0
+            flows[lot, a] -= amount
+            flows[lot, b] += amount
+            if arriving:
+                # A lot new to b can only make moves off b cheaper
+                delta = filled[lot] - filled[lot, b]
+                delta[b] = np.inf
+                cheaper = delta < move[b]
+                move[b, cheaper] = delta[cheaper]
+                mover[b, cheaper] = lot
+            if flows[lot, a] <= volume_tolerance:
+                flows[lot, a] = 0.0
+                # Only moves that used this lot need another one
+                stale = np.flatnonzero(mover[a] == lot)
+                if len(stale):
+                    _move_costs(filled, flows, a, move, mover, stale)
+        excess[path[0]] -= amount
+        room[target] -= amount
+    return flows
+
+
+def allocate(df, capacities=None, volumes=None, plants=None, volume_column=VOLUME_COLUMN):
+    import numpy as np
+    import pandas as pd
+
+    plants, consumption, _ = plant_columns(df, plants)
+    costs = df[consumption].to_numpy(dtype=float)
+    supply = lot_volumes(df, volumes, volume_column)
+    capacity = plant_capacities(capacities, plants)
+
+    flows = solve_transportation(costs, supply, capacity)
+    flows[flows < 1e-9] = 0.0
+    lot_idx, plant_idx = np.nonzero(flows)
+
+    assignments = df[[col for col in KEY_COLUMNS if col in df.columns]].iloc[lot_idx].copy()
+    assignments['Plant'] = pd.Categorical.from_codes(plant_idx, categories=plants)
+    assignments['Volume'] = flows[lot_idx, plant_idx]
+    assignments['Cost $/Ton'] = costs[lot_idx, plant_idx]
+    assignments['Cost'] = assignments['Volume'] * assignments['Cost $/Ton']
+
+    plant_volume = flows.sum(axis=0)
+    plant_load = pd.DataFrame({
+        'Volume': plant_volume,
+        'Capacity': capacity,
+        'Cost': np.nansum(flows * np.nan_to_num(costs), axis=0),
+    }, index=pd.Index(plants, name='Plant'))
+    plant_load['Utilization'] = plant_load['Volume'] / plant_load['Capacity'].replace(np.inf, np.nan)
+
+    unconstrained_cost = float((np.nanmin(costs, axis=1) * supply).sum()) if len(df) else 0.0
+    return Allocation(
+        assignments=assignments,
+        plant_load=plant_load,
+        total_cost=float(plant_load['Cost'].sum()),
+        unconstrained_cost=unconstrained_cost,
+    )
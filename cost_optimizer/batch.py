@@ -0,0 +1,124 @@
+import argparse
+import os
+import sys
+import time
+
+from cost_optimizer.allocation import allocate
+from cost_optimizer.loader import load_potato_data, load_sales_data
+from cost_optimizer.schema import KEY_COLUMNS, plant_columns
+
+
+def cost_matrices(df, plants=None):
+    import numpy as np
+
+    plants, consumption, transport = plant_columns(df, plants)
+    costs = df[consumption].to_numpy(dtype=np.float64)
+    transport_costs = df[transport].to_numpy(dtype=np.float64)
+    return plants, costs, transport_costs
+
+
+def best_plants(costs):
+    import numpy as np
+
+    # Missing costs never win; rows with no cost at all get no destination
+    filled = np.where(np.isnan(costs), np.inf, costs)
+    best = filled.argmin(axis=1)
+    min_cost = filled[np.arange(len(filled)), best]
+    tie_count = (filled == min_cost[:, None]).sum(axis=1)
+
+    # Like the dashboard, a tie between plants means there is no single destination
+    destination = np.where((tie_count == 1) & np.isfinite(min_cost), best, -1)
+    min_cost = np.where(np.isfinite(min_cost), min_cost, np.nan)
+    return destination, min_cost, tie_count
+
+
+def recommend(df, plants=None):
+    import numpy as np
+    import pandas as pd
+
+    plants, costs, transport_costs = cost_matrices(df, plants)
+    destination, min_cost, tie_count = best_plants(costs)
+    has_destination = destination >= 0
+    rows = np.arange(len(df))
+
+    destination_transport = np.where(has_destination, transport_costs[rows, np.maximum(destination, 0)], np.nan)
+    savings = costs - min_cost[:, None]
+    transport_delta = transport_costs - destination_transport[:, None]
+
+    # Build the numeric block in one allocation instead of column by column
+    numeric = pd.DataFrame(
+        np.column_stack([min_cost, savings, transport_delta]),
+        columns=['Min Cost'] + [f'Savings vs {plant}' for plant in plants]
+        + [f'Transport Delta vs {plant}' for plant in plants],
+        index=df.index,
+    )
+    keys = df[[col for col in KEY_COLUMNS if col in df.columns]]
+    labels = pd.DataFrame({
+        'Destination Plant': pd.Categorical.from_codes(destination, categories=plants),
+        'Tied Plants': tie_count,
+    }, index=df.index)
+    return pd.concat([keys, labels, numeric], axis=1)
+
+
+def _load(path):
+    if path.lower().endswith(('.xlsx', '.xls')):
+        return load_potato_data(path)
+    return load_sales_data(path)
+
+
+def write_frame(df, path):
+    if path.lower().endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _capacity(value):
+    plant, sep, tons = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected PLANT=TONS, got {value!r}")
+    return plant, float(tons)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recommend the lowest-cost destination plant for every potato lot.")
+    parser.add_argument('input', help="potato_data.xlsx-style workbook or potato_sales.csv-style CSV")
+    parser.add_argument('-o', '--output', required=True, help="output file (.csv or .parquet)")
+    parser.add_argument('--plants', nargs='+', help="plants to compare (default: every plant in the input)")
+    parser.add_argument('--capacity', type=_capacity, action='append',
+                        help="plant capacity as PLANT=TONS; switches to capacity-constrained allocation")
+    parser.add_argument('--volume', type=float,
+                        help="volume per lot in tons for allocation (default: the Volume column, else 1)")
+    parser.add_argument('--graph', help="logistics edge list CSV (From, To, Cost $/Ton[, Both Ways]) with nodes named "
+                                        "after regions and '<plant> Plant'; transport costs become the cheapest "
+                                        "route from each lot's region to each plant")
+    args = parser.parse_args(argv)
+
+    df, load_info = _load(args.input)
+    start = time.perf_counter()
+    try:
+        if args.graph:
+            from cost_optimizer.logistics import LogisticsGraph, apply_transport_costs
+
+            df = apply_transport_costs(df, LogisticsGraph.from_csv(args.graph), args.plants)
+        allocation = allocate(df, dict(args.capacity), args.volume, args.plants) if args.capacity else None
+    except ValueError as e:
+        # Unknown plants, too little capacity or a bad edge list
+        parser.error(str(e))
+    if allocation is not None:
+        result = allocation.assignments
+        label = f"allocation ({len(result)} lot/plant flows, total cost {allocation.total_cost:,.0f}, " \
+                f"capacity premium {allocation.capacity_premium:,.0f})"
+    else:
+        result = recommend(df, args.plants)
+        label = f"{len(result)} recommendations"
+    elapsed = time.perf_counter() - start
+    write_frame(result, args.output)
+
+    print(load_info.summary(), file=sys.stderr)
+    print(f"{label} in {elapsed * 1000:.1f} ms -> {os.path.abspath(args.output)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+def _go():
+    # plotly is only needed once a figure is actually built
+    import plotly.graph_objects as go
+    return go
+
+
+def sankey_figure(nodes, links, title="Consumption Cost Flow "):
+    go = _go()
+    fig = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=15,
+            thickness=20,
+            line=dict(color="black", width=0.5),
+            label=nodes
+        ),
+        link=dict(
+            source=[link['source'] for link in links],
+            target=[link['target'] for link in links],
+            value=[link['value'] for link in links],
+            color='rgba(0, 128, 255, 0.4)'
+        )
+    )])
+
+    fig.update_layout(title_text=title, font_size=10)
+    return fig
+
+
+def cost_flow_sankey(costs):
+    # Improved flow diagram with shades of blue
+    go = _go()
+    flow_labels = ['Consumption Cost'] + [f'{plant} Plant' for plant in costs]
+    flow_values = list(costs.values())
+    flow_sources = [0] * len(costs)
+    flow_targets = list(range(1, len(costs) + 1))
+
+    colors = ['#A3C2E2', '#7EB0E8', '#4A90E2', '#0033A0']
+
+    fig = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=15,
+            thickness=20,
+            line=dict(color="black", width=0.5),
+            label=flow_labels,
+            color="blue"
+        ),
+        link=dict(
+            source=flow_sources,
+            target=flow_targets,
+            value=flow_values,
+            color=[colors[i % len(colors)] for i in range(len(costs))]
+        )
+    )])
+
+    fig.update_layout(title_text="Potato Cost Flow Analysis", font_size=10)
+    return fig
+
+
+def plant_price_bar(costs):
+    # Bar chart for potato prices
+    go = _go()
+    fig = go.Figure()
+    for plant, cost in costs.items():
+        fig.add_trace(go.Bar(
+            x=[plant],
+            y=[cost],
+            name=plant
+        ))
+
+    fig.update_layout(title_text="Potato Prices per Plant", xaxis_title="Plant", yaxis_title="Price")
+    return fig
+
+
+def regional_average_bar(regions, avg_costs):
+    go = _go()
+    fig = go.Figure(data=[
+        go.Bar(name='Selected Region', x=regions, y=avg_costs)
+    ])
+
+    fig.update_layout(barmode='group', title_text="Average Cost per Ton in Different Regions",
+                      xaxis_title="Region", yaxis_title="Average Cost per Ton")
+    return fig
+
+
+def cheapest_probability_bar(plants, probabilities):
+    go = _go()
+    fig = go.Figure(data=[go.Bar(x=plants, y=probabilities, marker_color='#4A90E2')])
+    fig.update_layout(title_text="Probability of Being the Cheapest Plant", xaxis_title="Plant",
+                      yaxis_title="Probability", yaxis_range=[0, 1])
+    return fig
+
+
+def savings_histogram(counts, edges, plant):
+    # Bins are counted while simulating, so only one bar per bin reaches the browser
+    go = _go()
+    fig = go.Figure(data=[go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=edges[1:] - edges[:-1],
+                                 marker_color='#0033A0')])
+    fig.update_layout(title_text=f"Savings Available by Moving from {plant}", xaxis_title="Savings ($/Ton)",
+                      yaxis_title="Scenarios")
+    return fig
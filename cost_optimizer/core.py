@@ -0,0 +1,221 @@
+from dataclasses import dataclass
+
+from cost_optimizer.schema import COMPONENT_COLUMNS, consumption_column, transport_column
+from cost_optimizer.streaming import column_mean, column_min
+
+# Heavy dependencies (numpy, pandas) are imported inside the functions that
+# need them so importing the core stays cheap for CLI and batch workers.
+
+
+@dataclass(frozen=True)
+class PlantComparison:
+    selected_plant: str
+    destination_plant: str | None
+    selected_plant_cost: int
+    destination_plant_cost: int | None
+    cost_difference: int | None
+    buying_rate: int
+    plant_loss: int
+    cold_store_loss: int
+    leno_bag_and_others: int
+    transportation_cost_selected: int
+    transportation_cost_destination: int | None
+
+
+@dataclass(frozen=True)
+class RelocationSummary:
+    selected_plant: str
+    destination_plant: str
+    selected_plant_cost: float
+    lowest_cost: float
+    transportation_cost_selected: float
+    transportation_cost_destination: float
+    total_cost_selected: float
+    total_cost_destination: float
+
+    @property
+    def difference(self):
+        return self.total_cost_selected - self.total_cost_destination
+
+
+def destination_plant(lot, plants):
+    # Lowest consumption cost for a single lot; None when plants are tied
+    from cost_optimizer.batch import best_plants
+
+    costs = lot[[consumption_column(lot, plant) for plant in plants]].to_numpy(dtype=float)[:1]
+    destination, _, _ = best_plants(costs)
+    return plants[destination[0]] if destination[0] >= 0 else None
+
+
+def lot_costs(lot, plants):
+    return {plant: lot[consumption_column(lot, plant)].values[0] for plant in plants}
+
+
+def compare_plants(lot, selected_plant, plants):
+    destination = destination_plant(lot, plants)
+
+    selected_plant_cost = round(lot[consumption_column(lot, selected_plant)].values[0])
+    if destination:
+        destination_plant_cost = round(lot[consumption_column(lot, destination)].values[0])
+        cost_difference = int(round(selected_plant_cost - destination_plant_cost))
+        transportation_cost_destination = round(lot[transport_column(lot, destination)].values[0])
+    else:
+        destination_plant_cost = None
+        cost_difference = None
+        transportation_cost_destination = None
+
+    # Breakdown costs
+    buying_rate, plant_loss, cold_store_loss, leno_bag_and_others = (
+        round(lot[col].values[0]) for col in COMPONENT_COLUMNS
+    )
+
+    return PlantComparison(
+        selected_plant=selected_plant,
+        destination_plant=destination,
+        selected_plant_cost=selected_plant_cost,
+        destination_plant_cost=destination_plant_cost,
+        cost_difference=cost_difference,
+        buying_rate=buying_rate,
+        plant_loss=plant_loss,
+        cold_store_loss=cold_store_loss,
+        leno_bag_and_others=leno_bag_and_others,
+        transportation_cost_selected=round(lot[transport_column(lot, selected_plant)].values[0]),
+        transportation_cost_destination=transportation_cost_destination,
+    )
+
+
+def insight_markdown(bu, comparison):
+    c = comparison
+    if c.destination_plant is None:
+        return f"""
+    **Cost Analysis and Optimization Suggestion**
+
+    All plants have the same cost for the selected potato. Therefore, there is no specific plant that stands out as the lowest-cost option.
+
+    The cost for the selected plant **{c.selected_plant}** and other plants is uniformly **${c.selected_plant_cost}/ton**.
+
+    **Summary:**\n
+    Since all plants have the same cost, cost optimization is not applicable in this scenario. You can consider other factors such as logistical aspects or production capacities for making a decision.
+
+    **Recommendation:**\n
+    Given the uniformity in cost, you may continue with the selected plant or choose based on other strategic factors, as no cost savings are identified in the current analysis.
+    """
+    if c.selected_plant == c.destination_plant:
+        return f"""
+    **Cost Analysis and Optimization Suggestion**
+
+    You have selected **{c.selected_plant}**, which is currently the lowest-cost option among the available plants.
+    The total cost for **{c.selected_plant}** is **${c.selected_plant_cost}/ton**, which is lower compared to other plants.
+    Therefore, no further cost optimization is possible with the given data.
+    """
+    return f"""
+    **Cost Analysis and Optimization Suggestion**
+
+    By relocating production from **{c.selected_plant}** to **{c.destination_plant}**, the estimated cost savings are **${c.cost_difference}/ton**.
+
+    The breakdown of costs at **{c.selected_plant}** includes:
+    - Buying rate: **${c.buying_rate}**/ton
+    - Plant loss: **${c.plant_loss}**/ton
+    - Cold store loss: **${c.cold_store_loss}**/ton
+    - Leno bag and others: **${c.leno_bag_and_others}**/ton
+    - Transportation cost: **${c.transportation_cost_selected}**/ton
+    - Total consumption cost at **{c.selected_plant}**: **${c.selected_plant_cost}/ton**
+
+    Total consumption cost at **{c.destination_plant}**: **${c.destination_plant_cost}/ton**
+
+    At **{c.destination_plant}**, the transportation cost is **${c.transportation_cost_destination}**/ton which is comparatively lower than the transportation cost of **{c.selected_plant}**.
+
+    This comprehensive cost analysis highlights the potential savings by considering all aspects of production and transportation costs. In the Business Unit (BU) of **{bu}**, relocating operations from **{c.selected_plant}** to **{c.destination_plant}** could lead to significant savings. The savings in cost will amount to the difference between the total costs at these two plants, considering factors like buying rate, plant loss, cold store loss, leno bag and other costs, and transportation cost.
+
+    **Final Summary:**
+    Based on the analysis, it is suggested to move the plant from **{c.selected_plant}** to **{c.destination_plant}** to achieve a cost savings of **${c.cost_difference}**/ton. This decision is derived from the detailed cost breakdown and comparison of total costs, ensuring a more cost-effective production process.
+
+    Please note that this analysis is based on the provided data and theoretical assumptions. In a real-world scenario, additional factors such as infrastructure, labor costs, regulations, and other variables need to be considered for a comprehensive analysis and accurate predictions regarding plant relocation.
+    """
+
+
+def plant_costs(filtered, plants):
+    # Average consumption cost per plant over the filtered rows
+    costs = {}
+    for plant in plants:
+        try:
+            column = consumption_column(filtered, plant)
+        except KeyError:
+            continue
+        costs[plant] = column_mean(filtered, column)
+    return costs
+
+
+def relocation_summary(filtered, selected_plant, plants):
+    selected_plant_cost = column_mean(filtered, consumption_column(filtered, selected_plant))
+    plant_minimums = {plant: column_min(filtered, consumption_column(filtered, plant)) for plant in plants}
+    lowest_cost = min(plant_minimums.values())
+    # A selected plant tied for the lowest cost is already the best place to stay
+    if plant_minimums[selected_plant] == lowest_cost:
+        destination = selected_plant
+    else:
+        destination = next(plant for plant in plants if plant_minimums[plant] == lowest_cost)
+
+    transportation_cost_selected = column_mean(filtered, transport_column(filtered, selected_plant))
+    transportation_cost_destination = column_mean(filtered, transport_column(filtered, destination))
+    return RelocationSummary(
+        selected_plant=selected_plant,
+        destination_plant=destination,
+        selected_plant_cost=selected_plant_cost,
+        lowest_cost=lowest_cost,
+        transportation_cost_selected=transportation_cost_selected,
+        transportation_cost_destination=transportation_cost_destination,
+        total_cost_selected=selected_plant_cost + transportation_cost_selected,
+        total_cost_destination=lowest_cost + transportation_cost_destination,
+    )
+
+
+def sankey_data(filtered, plants, bu=None, season=None, region=None, potato=None, plant_labels=None):
+    # Nodes and links for the BU -> Season -> Region -> Potato -> Plant flow
+    plant_labels = plant_labels or {plant: plant for plant in plants}
+    nodes = []
+    links = []
+
+    # Initial BU nodes
+    if not bu:
+        nodes.extend(filtered['BU'].unique())
+        return nodes, links
+
+    # BU selected, show Seasons
+    nodes.append(bu)
+    bu_node_index = 0
+
+    seasons = filtered['Season'].unique()
+    season_node_indices = {s: i + 1 for i, s in enumerate(seasons)}
+    nodes.extend(seasons)
+    for s in seasons:
+        links.append(dict(source=bu_node_index, target=season_node_indices[s], value=1))
+
+    if not season:
+        return nodes, links
+
+    regions = filtered[filtered['Season'] == season]['Region'].unique()
+    region_node_indices = {r: i + 1 + len(seasons) for i, r in enumerate(regions)}
+    nodes.extend(regions)
+    for r in regions:
+        links.append(dict(source=season_node_indices[season], target=region_node_indices[r], value=1))
+
+    if not region:
+        return nodes, links
+
+    potatoes = filtered[filtered['Region'] == region]['Potato'].unique()
+    potato_node_indices = {p: i + 1 + len(seasons) + len(regions) for i, p in enumerate(potatoes)}
+    nodes.extend(potatoes)
+    for p in potatoes:
+        links.append(dict(source=region_node_indices[region], target=potato_node_indices[p], value=1))
+
+    if not potato:
+        return nodes, links
+
+    offset = 1 + len(seasons) + len(regions) + len(potatoes)
+    plant_node_indices = {plant: i + offset for i, plant in enumerate(plants)}
+    nodes.extend(plant_labels[plant] for plant in plants)
+    for plant, avg_cost in plant_costs(filtered, plants).items():
+        links.append(dict(source=potato_node_indices[potato], target=plant_node_indices[plant], value=avg_cost))
+
+    return nodes, links
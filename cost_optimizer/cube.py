@@ -0,0 +1,81 @@
+from cost_optimizer.schema import CONSUMPTION_COST, LOT, PLANT, TRANSPORT_COST, long_costs, plant_columns
+from cost_optimizer.streaming import stat_column
+
+CUBE_LEVELS = ['BU', 'Season', 'Region']
+MEASURES = ['Consumption', 'Transport']
+
+
+def build_cube(df, plants=None):
+    """BU x Season x Region x Plant sums and counts of consumption and transport cost.
+
+    Accumulated with bincount over the long (lot, plant) layout, so the cost
+    is linear in lots x plants; accepts raw rows or streaming aggregates.
+    """
+    import numpy as np
+    import pandas as pd
+
+    plants, consumption, transport = plant_columns(df, plants)
+    n_plants = len(plants)
+    pre_aggregated = stat_column(consumption[0], 'sum') in df.columns
+    if pre_aggregated:
+        sums = long_costs(df, plants, [stat_column(col, 'sum') for col in consumption],
+                          [stat_column(col, 'sum') for col in transport])
+        counts = long_costs(df, plants, [stat_column(col, 'count') for col in consumption],
+                            [stat_column(col, 'count') for col in transport])
+    else:
+        sums = long_costs(df, plants)
+
+    # One cell per BU/Season/Region group and plant, groups in order of appearance.
+    # Rows with a missing key go to a spill cell past the end that is dropped.
+    grouped = df.groupby(CUBE_LEVELS, sort=False)
+    group_codes = grouped.ngroup().to_numpy()
+    keys = grouped.size().index.to_frame(index=False)
+    n_cells = len(keys) * n_plants
+
+    lot_groups = group_codes[sums[LOT].to_numpy()]
+    cells = np.where(lot_groups >= 0, lot_groups * n_plants + sums[PLANT].cat.codes.to_numpy(), n_cells)
+
+    cube = keys.loc[keys.index.repeat(n_plants)].reset_index(drop=True)
+    cube[PLANT] = pd.Categorical.from_codes(np.tile(np.arange(n_plants), len(keys)), categories=plants)
+    columns = {}
+    for measure, column in zip(MEASURES, (CONSUMPTION_COST, TRANSPORT_COST)):
+        values = sums[column].to_numpy()
+        missing = np.isnan(values)
+        columns[f'{measure} Sum'] = np.bincount(cells, weights=np.where(missing, 0.0, values), minlength=n_cells + 1)
+        if pre_aggregated:
+            count = np.bincount(cells, weights=np.nan_to_num(counts[column].to_numpy()), minlength=n_cells + 1)
+        else:
+            count = np.bincount(cells[~missing], minlength=n_cells + 1)
+        columns[f'{measure} Count'] = count.astype('int64')
+
+    for name in [f'{measure} Sum' for measure in MEASURES] + [f'{measure} Count' for measure in MEASURES]:
+        cube[name] = columns[name][:n_cells]
+    return cube
+
+
+class CostCube:
+    def __init__(self, frame):
+        self.frame = frame
+        self.plants = list(frame['Plant'].cat.categories)
+
+    def _slice(self, **filters):
+        mask = None
+        for level, value in filters.items():
+            if value is None or value == '':
+                continue
+            level_mask = self.frame[level] == value
+            mask = level_mask if mask is None else mask & level_mask
+        return self.frame if mask is None else self.frame[mask]
+
+    def plant_means(self, by, measure='Consumption', **filters):
+        # Mean cost per plant for each value of the `by` levels, in data order
+        cells = self._slice(**filters)
+        grouped = cells.groupby(list(by) + ['Plant'], sort=False, observed=True)[
+            [f'{measure} Sum', f'{measure} Count']].sum()
+        means = grouped[f'{measure} Sum'] / grouped[f'{measure} Count']
+        return means.unstack('Plant').reindex(columns=self.plants)
+
+    def regional_averages(self, bu, measure='Consumption'):
+        # Average over plants of each plant's mean cost per region, for the regional chart
+        means = self.plant_means(['Region'], measure, BU=bu)
+        return means.index.tolist(), means.mean(axis=1).tolist()
@@ -0,0 +1,87 @@
+LEVELS = ('BU', 'Season', 'Region', 'Potato')
+
+
+def selection_prefix(values):
+    # Selections only narrow the data up to the first level left empty
+    prefix = []
+    for value in values:
+        if value is None or value == '':
+            break
+        prefix.append(value)
+    return tuple(prefix)
+
+
+class HierarchyIndex:
+    """BU -> Season -> Region -> Potato index built once per dataset.
+
+    Rows are reordered so every selection prefix is a contiguous row range,
+    which turns option lists and filtered slices into dict lookups.
+    """
+
+    def __init__(self, df, levels=LEVELS, positions=None):
+        import numpy as np
+        import pandas as pd
+
+        self.levels = tuple(levels)
+        n = len(df)
+
+        codes = []
+        uniques = []
+        for level in self.levels:
+            level_codes, level_uniques = pd.factorize(df[level], sort=False)
+            codes.append(level_codes)
+            uniques.append(level_uniques)
+
+        if positions is None:
+            # np.lexsort is stable and treats the last key as the primary one
+            order = np.lexsort(codes[::-1]) if n else np.arange(0)
+            self.frame = df.take(order)
+            positions = order
+        else:
+            # df is already in index order (e.g. a saved index.frame); positions are
+            # the original row numbers, which only decide the order of the options
+            order = np.arange(n)
+            self.frame = df
+
+        self._ranges = {(): (0, n)}
+        self._children = {}
+        boundary = np.zeros(n, dtype=bool)
+        if n:
+            boundary[0] = True
+        valid = np.ones(n, dtype=bool)
+
+        for depth, level_codes in enumerate(codes):
+            sorted_codes = level_codes[order]
+            boundary[1:] |= sorted_codes[1:] != sorted_codes[:-1]
+            # Rows with a missing value at any level never match a selection
+            valid &= sorted_codes >= 0
+
+            starts = np.flatnonzero(boundary)
+            stops = np.append(starts[1:], n)
+            # First original row of each group, to keep options in data order
+            first_rows = np.minimum.reduceat(positions, starts) if n else starts
+
+            groups = []
+            for start, stop, first_row in zip(starts, stops, first_rows):
+                if not valid[start]:
+                    continue
+                key = tuple(uniques[d][codes[d][order[start]]] for d in range(depth + 1))
+                self._ranges[key] = (int(start), int(stop))
+                groups.append((first_row, key))
+
+            groups.sort()
+            for _, key in groups:
+                self._children.setdefault(key[:-1], []).append(key[-1])
+
+    def options(self, *prefix):
+        return list(self._children.get(selection_prefix(prefix), []))
+
+    def row_range(self, *prefix):
+        return self._ranges.get(selection_prefix(prefix), (0, 0))
+
+    def select(self, *prefix):
+        start, stop = self.row_range(*prefix)
+        return self.frame.iloc[start:stop]
+
+    def __contains__(self, key):
+        return tuple(key) in self._ranges
@@ -0,0 +1,216 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+
+PROFILE_ENV = 'COST_OPTIMIZER_PROFILE'
+PROFILE_LOG_ENV = 'COST_OPTIMIZER_PROFILE_LOG'
+DEFAULT_PROFILE_LOG = 'cost_optimizer_profile.jsonl'
+
+# Profiling modes: 'time' records wall time and RSS, 'memory' adds tracemalloc
+# (which slows every allocation down noticeably while it is active)
+MODES = {'1': 'time', 'true': 'time', 'time': 'time', 'memory': 'memory'}
+
+# Tracing is process-wide, so memory-mode timers share it: the first one starts it
+# and the last one to finish stops it, never while another session is mid-stage
+_tracing_lock = threading.Lock()
+_tracing = {'users': 0, 'owned': False}
+
+
+def _acquire_tracing():
+    with _tracing_lock:
+        if _tracing['users'] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing['owned'] = True
+        _tracing['users'] += 1
+
+
+def _release_tracing():
+    with _tracing_lock:
+        _tracing['users'] -= 1
+        if _tracing['users'] == 0 and _tracing['owned']:
+            tracemalloc.stop()
+            _tracing['owned'] = False
+
+
+def profile_mode(value=None):
+    value = os.environ.get(PROFILE_ENV, '') if value is None else value
+    return MODES.get(str(value).strip().lower())
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Not Linux: fall back to the peak RSS the OS reports
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageTimer:
+    """Wall time, RSS and (optionally) traced allocations per named stage of a rerun."""
+
+    enabled = True
+
+    def __init__(self, app, mode='time', log_path=None):
+        self.app = app
+        self.mode = mode
+        self.log_path = log_path or os.environ.get(PROFILE_LOG_ENV, DEFAULT_PROFILE_LOG)
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self._pending = []
+        self._section = 'page'
+        self._tracing = mode == 'memory'
+        if self._tracing:
+            _acquire_tracing()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        tracing = self.mode == 'memory' and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            traced_before, _ = tracemalloc.get_traced_memory()
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {
+                'section': self._section,
+                'stage': name,
+                'wall_ms': (time.perf_counter() - start) * 1000,
+                'rss_mb': rss_bytes() / 2**20,
+                'rss_delta_mb': (rss_bytes() - rss_before) / 2**20,
+            }
+            if tracing:
+                traced_after, traced_peak = tracemalloc.get_traced_memory()
+                record['alloc_kb'] = (traced_after - traced_before) / 1024
+                record['peak_kb'] = (traced_peak - traced_before) / 1024
+            self.records.append(record)
+            self._pending.append(record)
+
+    @contextlib.contextmanager
+    def section(self, name):
+        # Fragments rerun on their own, so their stages go to a log line of their own
+        outer = self._pending, self._section
+        self._pending, self._section = [], name
+        try:
+            yield
+        finally:
+            pending = self._pending
+            self._pending, self._section = outer
+            self._write(name, pending)
+
+    def log(self):
+        # Append the page stages recorded since the last call as one JSON line
+        pending, self._pending = self._pending, []
+        self._write('page', pending)
+        if self._tracing:
+            _release_tracing()
+            self._tracing = False
+
+    def _write(self, section, stages):
+        if not stages:
+            return
+        line = {
+            'ts': time.time(),
+            'app': self.app,
+            'run_id': self.run_id,
+            'section': section,
+            'total_ms': sum(record['wall_ms'] for record in stages),
+            'stages': stages,
+        }
+        try:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(line) + '\n')
+        except OSError:
+            pass
+
+
+class NullTimer:
+    enabled = False
+    records = ()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        yield
+
+    @contextlib.contextmanager
+    def section(self, name):
+        yield
+
+    def log(self):
+        pass
+
+
+def stage_timer(app, mode=None):
+    mode = profile_mode(mode)
+    return StageTimer(app, mode) if mode else NullTimer()
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    k = (len(values) - 1) * q / 100
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def summarize(path, app=None):
+    # p50/p95 wall time (and peak allocations, when traced) per app and stage
+    samples = {}
+    with open(path) as f:
+        for line in f:
+            entry = json.loads(line)
+            if app and entry['app'] != app:
+                continue
+            for record in entry['stages']:
+                samples.setdefault((entry['app'], record['stage']), []).append(record)
+
+    rows = []
+    for (app_name, stage), records in sorted(samples.items()):
+        wall = [record['wall_ms'] for record in records]
+        row = {
+            'app': app_name,
+            'stage': stage,
+            'count': len(records),
+            'p50_ms': _percentile(wall, 50),
+            'p95_ms': _percentile(wall, 95),
+        }
+        peaks = [record['peak_kb'] for record in records if 'peak_kb' in record]
+        if peaks:
+            row['p50_peak_kb'] = _percentile(peaks, 50)
+            row['p95_peak_kb'] = _percentile(peaks, 95)
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize dashboard stage timings logged with COST_OPTIMIZER_PROFILE.")
+    parser.add_argument('log', nargs='?', default=DEFAULT_PROFILE_LOG, help="JSON lines profile log")
+    parser.add_argument('--app', help="only stages of this dashboard, e.g. potato.py")
+    parser.add_argument('--json', action='store_true', help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    rows = summarize(args.log, args.app)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    print(f"{'app':<16} {'stage':<28} {'count':>6} {'p50 ms':>10} {'p95 ms':>10}")
+    for row in rows:
+        print(f"{row['app']:<16} {row['stage']:<28} {row['count']:>6} {row['p50_ms']:>10.2f} {row['p95_ms']:>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
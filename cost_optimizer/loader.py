@@ -0,0 +1,161 @@
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+
+# Bump when the cleaning steps or sidecar layout change so old sidecars are not reused
+LOADER_VERSION = 3
+
+CACHE_DIR_ENV = 'COST_OPTIMIZER_CACHE_DIR'
+DEFAULT_CACHE_DIR = '.cost_optimizer_cache'
+
+
+@dataclass(frozen=True)
+class LoadInfo:
+    source: str
+    sidecar: str | None
+    cache_hit: bool
+    seconds: float
+    rows: int
+
+    def summary(self):
+        status = 'cache hit' if self.cache_hit else 'parsed'
+        return f"{os.path.basename(self.source)}: {self.rows} rows, {status} in {self.seconds * 1000:.0f} ms"
+
+
+def source_key(path):
+    # Identity of a source file version: changes whenever the file is rewritten
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def clean_potato_data(df):
+    df.columns = df.columns.str.strip()
+    df.dropna(how='all', inplace=True)
+
+    # Rename columns to remove '_price'
+    df.rename(columns=lambda x: x.replace('_Price', ''), inplace=True)
+    return df
+
+
+def _read_excel(path):
+    import pandas as pd
+
+    return clean_potato_data(pd.read_excel(path))
+
+
+def _read_csv(path):
+    import pandas as pd
+
+    return pd.read_csv(path)
+
+
+def _read_csv_aggregates(path):
+    from cost_optimizer.streaming import aggregate_csv
+
+    return aggregate_csv(path)
+
+
+READERS = {
+    'potato_data': _read_excel,
+    'sales': _read_csv,
+    'sales_aggregates': _read_csv_aggregates,
+}
+
+
+def _cache_dir(path):
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        return cache_dir
+    return os.path.join(os.path.dirname(os.path.abspath(path)), DEFAULT_CACHE_DIR)
+
+
+def _sidecar_prefix(path, kind):
+    abs_path = os.path.abspath(path)
+    path_hash = hashlib.sha1(abs_path.encode()).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(abs_path))[0]
+    return os.path.join(_cache_dir(path), f"{stem}.{kind}.{path_hash}.")
+
+
+def sidecar_path(path, kind, extension='.parquet'):
+    _, mtime_ns, size = source_key(path)
+    version_hash = hashlib.sha1(f"{mtime_ns}:{size}:{LOADER_VERSION}".encode()).hexdigest()[:12]
+    return _sidecar_prefix(path, kind) + version_hash + extension
+
+
+def _has_parquet():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _write_sidecar(df, sidecar, prefix, write=None):
+    cache_dir = os.path.dirname(sidecar)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write to a temporary file first so readers never see a partial sidecar
+    tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+    if write is None:
+        df.to_parquet(tmp_path, index=False)
+    else:
+        write(df, tmp_path)
+    os.replace(tmp_path, sidecar)
+
+    # Drop sidecars left behind by older versions of the same source
+    extension = os.path.splitext(sidecar)[1]
+    for name in os.listdir(cache_dir):
+        stale = os.path.join(cache_dir, name)
+        if stale.startswith(prefix) and stale != sidecar and stale.endswith(extension):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def load_frame(path, kind, reader=None):
+    import pandas as pd
+
+    start = time.perf_counter()
+    reader = reader or READERS[kind]
+
+    if not _has_parquet():
+        df = reader(path)
+        return df, LoadInfo(path, None, False, time.perf_counter() - start, len(df))
+
+    sidecar = sidecar_path(path, kind)
+    if os.path.exists(sidecar):
+        try:
+            df = pd.read_parquet(sidecar)
+            return df, LoadInfo(path, sidecar, True, time.perf_counter() - start, len(df))
+        except Exception:
+            # Corrupt or unreadable sidecar: fall back to parsing the source
+            pass
+
+    df = reader(path)
+    try:
+        _write_sidecar(df, sidecar, _sidecar_prefix(path, kind))
+    except (OSError, ValueError, TypeError):
+        # Caching is best effort; the parsed frame is still returned
+        sidecar = None
+    return df, LoadInfo(path, sidecar, False, time.perf_counter() - start, len(df))
+
+
+def load_potato_data(path='potato_data.xlsx'):
+    return load_frame(path, 'potato_data')
+
+
+def load_sales_data(path='potato_sales.csv'):
+    return load_frame(path, 'sales')
+
+
+def load_sales_aggregates(path='potato_sales.csv'):
+    return load_frame(path, 'sales_aggregates')
+
+
+def load_cost_cube(path, kind):
+    # The cube is derived from the cached dataset and gets its own sidecar next to it
+    from cost_optimizer.cube import build_cube
+
+    return load_frame(path, f'{kind}_cube', reader=lambda p: build_cube(load_frame(p, kind)[0]))
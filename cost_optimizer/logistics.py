@@ -0,0 +1,340 @@
+import heapq
+import math
+
+from cost_optimizer.schema import plant_columns
+
+SOURCE = 'From'
+TARGET = 'To'
+COST = 'Cost $/Ton'
+BOTH_WAYS = 'Both Ways'
+
+# Accepted Both Ways values; blank cells mean one-way
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', ''}
+
+# Plant node names in edge lists, as labelled in the dashboard
+PLANT_NODE = '{} Plant'
+
+# Past this many edge edits a cached tree is rebuilt instead of patched
+MAX_INCREMENTAL_EDITS = 64
+
+NO_HOP = -1
+
+
+def _flag(value):
+    if isinstance(value, str):
+        text = value.strip().lower()
+    elif value is None or value != value:
+        return False
+    elif value in (0, 1):
+        # bools and numbers, including numpy scalars
+        return bool(value)
+    else:
+        text = str(value)
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Unrecognized {BOTH_WAYS!r} value {value!r}; use 0/1, true/false or yes/no")
+
+
+def _flags(column):
+    # Blank means one-way; anything other than 0/1, true/false or yes/no is an error
+    return [_flag(value) for value in column]
+
+
+class _Tree:
+    """Cheapest cost from every node to one target, with each node's next hop.
+
+    Nodes are graph indices; dist and next_hop are plain lists so single-edge
+    patches stay cheap in pure Python.
+    """
+
+    def __init__(self, graph, target, version, dist=None, next_hop=None):
+        self.graph = graph
+        self.target = target
+        self.version = version
+        if dist is None:
+            n = len(graph._nodes)
+            self.dist = [math.inf] * n
+            self.next_hop = [NO_HOP] * n
+            self.dist[target] = 0.0
+            self._relax([(0.0, target)])
+        else:
+            self.dist = dist
+            self.next_hop = next_hop
+        self._array = None
+
+    def costs(self):
+        # dist as a float array with NaN for unreachable nodes, rebuilt only after updates
+        import numpy as np
+
+        if self._array is None or len(self._array) != len(self.dist):
+            array = np.array(self.dist, dtype=np.float64)
+            array[np.isinf(array)] = np.nan
+            self._array = array
+        return self._array
+
+    def _grow(self):
+        missing = len(self.graph._nodes) - len(self.dist)
+        if missing > 0:
+            self.dist.extend([math.inf] * missing)
+            self.next_hop.extend([NO_HOP] * missing)
+
+    def _relax(self, heap):
+        # Dijkstra over incoming edges, so distances are *to* the target
+        dist, next_hop, incoming = self.dist, self.next_hop, self.graph._in
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for pred, cost in incoming[node].items():
+                candidate = d + cost
+                if candidate < dist[pred]:
+                    dist[pred] = candidate
+                    next_hop[pred] = node
+                    heapq.heappush(heap, (candidate, pred))
+
+    def update(self, source, target, old, new):
+        self._grow()
+        self._array = None
+        dist, next_hop = self.dist, self.next_hop
+        if new is not None and (old is None or new < old):
+            # Cheaper edge: only paths through it can improve
+            candidate = new + dist[target]
+            if candidate < dist[source]:
+                dist[source] = candidate
+                next_hop[source] = target
+                self._relax([(candidate, source)])
+            return
+        if next_hop[source] != target:
+            # A dearer or removed edge off the tree changes nothing
+            return
+
+        # Every node whose cheapest path ran through the edge loses its distance...
+        children = {}
+        for node, hop in enumerate(next_hop):
+            if hop != NO_HOP:
+                children.setdefault(hop, []).append(node)
+        affected = [source]
+        stack = [source]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                affected.append(child)
+                stack.append(child)
+        for node in affected:
+            dist[node] = math.inf
+            next_hop[node] = NO_HOP
+
+        # ...and is re-seeded from its cheapest edge into the unaffected part
+        heap = []
+        outgoing = self.graph._out
+        for node in affected:
+            best, best_hop = math.inf, NO_HOP
+            for succ, cost in outgoing[node].items():
+                candidate = cost + dist[succ]
+                if candidate < best:
+                    best, best_hop = candidate, succ
+            if best_hop != NO_HOP:
+                dist[node] = best
+                next_hop[node] = best_hop
+                heap.append((best, node))
+        heapq.heapify(heap)
+        self._relax(heap)
+
+
+class LogisticsGraph:
+    """Regions, cold stores, hubs and plants joined by directed $/ton edges.
+
+    Shortest-path costs to each plant are cached per graph version. Cold
+    trees are built together in one scipy Dijkstra call when scipy is
+    available; after a few edge edits cached trees are patched instead.
+    """
+
+    def __init__(self):
+        self._index = {}
+        self._nodes = []
+        self._out = []
+        self._in = []
+        self._trees = {}
+        self._edits = []
+        self.version = 0
+
+    @classmethod
+    def from_frame(cls, edges, source=SOURCE, target=TARGET, cost=COST, both_ways=BOTH_WAYS):
+        graph = cls()
+        two_way = _flags(edges[both_ways]) if both_ways in edges.columns else [False] * len(edges)
+        for u, v, w, back in zip(edges[source], edges[target], edges[cost], two_way):
+            graph.set_edge(u, v, w, both_ways=back)
+        return graph
+
+    @classmethod
+    def from_csv(cls, path, **columns):
+        import pandas as pd
+
+        return cls.from_frame(pd.read_csv(path, skipinitialspace=True), **columns)
+
+    def __contains__(self, node):
+        return node in self._index
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _node(self, name):
+        index = self._index.get(name)
+        if index is None:
+            index = self._index[name] = len(self._nodes)
+            self._nodes.append(name)
+            self._out.append({})
+            self._in.append({})
+        return index
+
+    def edge_cost(self, source, target):
+        if source not in self._index or target not in self._index:
+            return None
+        return self._out[self._index[source]].get(self._index[target])
+
+    def edges(self):
+        for u, targets in enumerate(self._out):
+            for v, cost in targets.items():
+                yield self._nodes[u], self._nodes[v], cost
+
+    def set_edge(self, source, target, cost, both_ways=False):
+        cost = float(cost)
+        if not cost >= 0:
+            raise ValueError(f"Edge {source!r} -> {target!r} needs a non-negative cost, got {cost!r}")
+        self._change(self._node(source), self._node(target), cost)
+        if both_ways:
+            self._change(self._node(target), self._node(source), cost)
+
+    def remove_edge(self, source, target, both_ways=False):
+        if source not in self._index or target not in self._index:
+            return
+        u, v = self._index[source], self._index[target]
+        self._change(u, v, None)
+        if both_ways:
+            self._change(v, u, None)
+
+    def _change(self, u, v, cost):
+        old = self._out[u].get(v)
+        if old == cost:
+            return
+        if cost is None:
+            del self._out[u][v]
+            del self._in[v][u]
+        else:
+            self._out[u][v] = cost
+            self._in[v][u] = cost
+        self.version += 1
+        self._edits.append((self.version, u, v, old, cost))
+
+        # Keep only the edits a cached tree may still replay
+        if len(self._edits) > MAX_INCREMENTAL_EDITS:
+            del self._edits[:len(self._edits) - MAX_INCREMENTAL_EDITS]
+
+    def _current_tree(self, target):
+        # The cached tree for target brought up to date, or None if it must be rebuilt
+        tree = self._trees.get(target)
+        if tree is None or tree.version == self.version:
+            return tree
+        pending = [edit for edit in self._edits if edit[0] > tree.version]
+        if len(pending) != self.version - tree.version:
+            return None
+        for _, u, v, old, new in pending:
+            tree.update(u, v, old, new)
+        tree.version = self.version
+        return tree
+
+    def _build(self, targets):
+        try:
+            import numpy as np
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.csgraph import dijkstra
+        except ImportError:
+            for target in targets:
+                self._trees[target] = _Tree(self, target, self.version)
+            return
+
+        # Reversed adjacency, so each row of the result holds the costs *to* a target
+        n = len(self._nodes)
+        rows, cols, costs = [], [], []
+        for u, targets_of_u in enumerate(self._out):
+            for v, cost in targets_of_u.items():
+                rows.append(v)
+                cols.append(u)
+                costs.append(cost)
+        reversed_graph = csr_matrix((costs, (rows, cols)), shape=(n, n))
+        dist, hops = dijkstra(reversed_graph, indices=targets, return_predecessors=True)
+        hops = np.where(hops < 0, NO_HOP, hops)
+        for target, target_dist, target_hops in zip(targets, dist, hops):
+            self._trees[target] = _Tree(self, target, self.version, target_dist.tolist(), target_hops.tolist())
+
+    def _trees_for(self, names):
+        targets = [self._index[name] for name in names if name in self._index]
+        stale = [target for target in dict.fromkeys(targets) if self._current_tree(target) is None]
+        if stale:
+            self._build(stale)
+        return {self._nodes[target]: self._trees[target] for target in targets}
+
+    def costs_to(self, target):
+        """Cheapest $/ton to target from every node that can reach it."""
+        tree = self._trees_for([target]).get(target)
+        if tree is None:
+            return {}
+        return {self._nodes[i]: d for i, d in enumerate(tree.dist) if d < math.inf}
+
+    def path(self, source, target):
+        # Nodes on the cheapest route, or None when target cannot be reached
+        tree = self._trees_for([target]).get(target)
+        if tree is None or source not in self._index:
+            return None
+        node = self._index[source]
+        if tree.dist[node] == math.inf:
+            return None
+        route = [node]
+        while route[-1] != tree.target:
+            route.append(tree.next_hop[route[-1]])
+        return [self._nodes[i] for i in route]
+
+    def cost_matrix(self, sources, targets):
+        # sources x targets cheapest costs; NaN where there is no route
+        import numpy as np
+
+        trees = self._trees_for(targets)
+        source_index = np.array([self._index.get(source, -1) for source in sources], dtype=np.int64)
+        matrix = np.full((len(sources), len(targets)), np.nan)
+        known = source_index >= 0
+        for j, target in enumerate(targets):
+            tree = trees.get(target)
+            if tree is not None:
+                matrix[known, j] = tree.costs()[source_index[known]]
+        return matrix
+
+
+def apply_transport_costs(df, graph, plants=None, region_column='Region', region_node='{}', plant_node=PLANT_NODE):
+    """Replace static transport costs with shortest-path costs from each row's region.
+
+    Graph nodes are named region_node/plant_node formatted with the region or
+    plant, e.g. 'HP' and 'UP Plant', so a region and a plant may share a name.
+    Consumption cost is the cost components plus transport, so it moves by the
+    same amount. Plants a region cannot reach get NaN, which the destination
+    logic never picks; regions missing from the graph keep their static costs.
+    """
+    import numpy as np
+    import pandas as pd
+
+    plants, consumption, transport = plant_columns(df, plants)
+    codes, regions = pd.factorize(df[region_column])
+    sources = [region_node.format(region) for region in regions]
+    # An extra row for missing regions (code -1), which keep their static costs
+    routed = graph.cost_matrix(sources, [plant_node.format(plant) for plant in plants])
+    routed = np.vstack([routed, np.full((1, len(plants)), np.nan)])
+    known = np.array([source in graph for source in sources] + [False])
+
+    old_transport = df[transport].to_numpy(dtype=np.float64)
+    new_transport = np.where(known[codes][:, None], routed[codes], old_transport)
+
+    result = df.copy()
+    result[transport] = new_transport
+    result[consumption] = df[consumption].to_numpy(dtype=np.float64) - old_transport + new_transport
+    return result
@@ -0,0 +1,279 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cost_optimizer.hierarchy import LEVELS, HierarchyIndex
+from cost_optimizer.loader import load_frame
+from cost_optimizer.schema import plant_schema
+
+# Bump when the page layout changes so every page is rendered again
+REPORT_VERSION = 1
+
+MANIFEST = 'manifest.json'
+INDEX_PAGE = 'index.html'
+PLOTLY_JS = 'plotly.min.js'
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+th, td {{ padding: 4px 12px; text-align: left; border-bottom: 1px solid #ddd; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# Worker state, loaded once per process by _init_worker
+_state = {}
+
+
+def _kind(path):
+    return 'potato_data' if path.lower().endswith(('.xlsx', '.xls')) else 'sales'
+
+
+def _slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-') or 'x'
+
+
+def page_name(key):
+    # Readable and stable; the hash keeps keys that slug alike apart
+    digest = hashlib.sha1(json.dumps([str(value) for value in key]).encode()).hexdigest()[:8]
+    return '_'.join(_slug(value) for value in key) + f'-{digest}.html'
+
+
+def content_hashes(index, keys, plants, images):
+    """Hash of each combination's rows and the report settings, for skipping unchanged pages."""
+    import pandas as pd
+
+    row_hashes = pd.util.hash_pandas_object(index.frame, index=False).to_numpy()
+    settings = json.dumps([REPORT_VERSION, list(plants), bool(images)]).encode()
+    hashes = {}
+    for key in keys:
+        start, stop = index.row_range(*key)
+        digest = hashlib.sha1(settings)
+        digest.update(row_hashes[start:stop].tobytes())
+        hashes[key] = digest.hexdigest()
+    return hashes
+
+
+def _markdown_html(text):
+    # Just the markdown insight_markdown uses: **bold**, '- ' bullets and paragraphs
+    blocks = []
+    items = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('- '):
+            items.append(line[2:])
+            continue
+        if items:
+            blocks.append('<ul>' + ''.join(f'<li>{_inline(item)}</li>' for item in items) + '</ul>')
+            items = []
+        if line:
+            blocks.append(f'<p>{_inline(line)}</p>')
+    if items:
+        blocks.append('<ul>' + ''.join(f'<li>{_inline(item)}</li>' for item in items) + '</ul>')
+    return '\n'.join(blocks)
+
+
+def _inline(text):
+    return re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', html.escape(text))
+
+
+def render_page(lot, key, plants):
+    """Summary table, insight text and charts for one combination, as an HTML body."""
+    import pandas as pd
+
+    from cost_optimizer import charts
+    from cost_optimizer.core import compare_plants, insight_markdown, lot_costs
+
+    bu = key[0]
+    comparisons = [compare_plants(lot, plant, plants) for plant in plants]
+    summary = pd.DataFrame({
+        'BU': [bu] * len(plants),
+        'Plant to move': plants,
+        'Destination Plant': [c.destination_plant for c in comparisons],
+        'Difference in Cost': [c.cost_difference if c.destination_plant else 'N/A' for c in comparisons],
+    })
+
+    costs = lot_costs(lot, plants)
+    sankey_fig = charts.cost_flow_sankey(costs)
+    bar_fig = charts.plant_price_bar(costs)
+
+    sections = [
+        f'<p><a href="{INDEX_PAGE}">All combinations</a></p>',
+        f'<h1>{html.escape(" / ".join(str(value) for value in key))}</h1>',
+        '<h2>Cost Analysis Summary</h2>',
+        summary.to_html(index=False, border=0, classes='table table-striped'),
+    ]
+    for comparison in comparisons:
+        sections.append(f'<h2>Moving from {html.escape(str(comparison.selected_plant))}</h2>')
+        sections.append(_markdown_html(insight_markdown(bu, comparison)))
+    # Fixed div ids keep the output byte-identical between runs
+    sections.append(sankey_fig.to_html(full_html=False, include_plotlyjs=False, div_id='cost-flow'))
+    sections.append(bar_fig.to_html(full_html=False, include_plotlyjs=False, div_id='plant-prices'))
+    return '\n'.join(sections), (sankey_fig, bar_fig)
+
+
+def _image_paths(output_dir, name):
+    stem = os.path.splitext(name)[0]
+    return [os.path.join(output_dir, f'{stem}.{suffix}.png') for suffix in ('sankey', 'bar')]
+
+
+def _write(path, text):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(path, kind, plants, output_dir, images):
+    df, _ = load_frame(path, kind)
+    _state.update(index=HierarchyIndex(df), plants=plants, output_dir=output_dir, images=images)
+
+
+def _render(key):
+    index, output_dir = _state['index'], _state['output_dir']
+    name = page_name(key)
+    body, figures = render_page(index.select(*key), key, _state['plants'])
+    title = ' / '.join(str(value) for value in key)
+    _write(os.path.join(output_dir, name), PAGE.format(title=html.escape(title), plotly_js=PLOTLY_JS, body=body))
+
+    image_error = None
+    if _state['images']:
+        try:
+            for image_path, fig in zip(_image_paths(output_dir, name), figures):
+                fig.write_image(image_path)
+        except (ImportError, ValueError) as e:
+            # Static images need kaleido; the HTML page is still written
+            image_error = str(e)
+    return name, image_error
+
+
+def index_page(index, keys, plants, pages):
+    from cost_optimizer.batch import recommend
+
+    # The destination for each combination, from its first row as on the pages
+    first_rows = index.frame.iloc[[index.row_range(*key)[0] for key in keys]]
+    recommendations = recommend(first_rows, plants)
+    rows = []
+    for key, (_, rec) in zip(keys, recommendations.iterrows()):
+        cells = ''.join(f'<td>{html.escape(str(value))}</td>' for value in key)
+        destination = rec['Destination Plant']
+        destination = 'Tied' if destination != destination else html.escape(str(destination))
+        rows.append(f'<tr>{cells}<td>{destination}</td><td>{rec["Min Cost"]:.2f}</td>'
+                    f'<td><a href="{pages[key]}">report</a></td></tr>')
+    header = ''.join(f'<th>{level}</th>' for level in LEVELS)
+    body = (f'<h1>Cost Analysis Reports</h1>\n<p>{len(keys)} combinations</p>\n'
+            f'<table>\n<tr>{header}<th>Destination Plant</th><th>Min Cost $/Ton</th><th></th></tr>\n'
+            + '\n'.join(rows) + '\n</table>')
+    return PAGE.format(title='Cost Analysis Reports', plotly_js=PLOTLY_JS, body=body)
+
+
+def all_keys(index):
+    # Every BU/Season/Region/Potato combination, in sidebar order
+    keys = [()]
+    for _ in LEVELS:
+        keys = [key + (option,) for key in keys for option in index.options(*key)]
+    return keys
+
+
+def generate_reports(path, output_dir, plants=None, workers=None, images=False, force=False):
+    """Render one page per combination plus an index; returns (rendered, skipped, removed) counts."""
+    kind = _kind(path)
+    df, _ = load_frame(path, kind)
+    index = HierarchyIndex(df)
+    plants = list(plant_schema(df).plants) if plants is None else list(plants)
+    keys = all_keys(index)
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+
+    hashes = content_hashes(index, keys, plants, images)
+    pages = {key: page_name(key) for key in keys}
+    def up_to_date(key):
+        paths = [os.path.join(output_dir, pages[key])]
+        if images:
+            paths += _image_paths(output_dir, pages[key])
+        return previous.get(pages[key]) == hashes[key] and all(os.path.exists(path) for path in paths)
+
+    todo = [key for key in keys if force or not up_to_date(key)]
+
+    plotly_js = os.path.join(output_dir, PLOTLY_JS)
+    if not os.path.exists(plotly_js):
+        from plotly.offline import get_plotlyjs
+
+        _write(plotly_js, get_plotlyjs())
+
+    image_errors = set()
+    failed = set()
+    if todo:
+        # A few chunks per worker keeps IPC low while still balancing the load
+        chunksize = max(1, len(todo) // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(path, kind, plants, output_dir, images)) as pool:
+            for name, image_error in pool.map(_render, todo, chunksize=chunksize):
+                if image_error:
+                    image_errors.add(image_error)
+                    failed.add(name)
+    for error in image_errors:
+        print(f"Images skipped: {error}", file=sys.stderr)
+
+    # Pages of combinations that no longer exist
+    current = set(pages.values())
+    removed = 0
+    for name in previous:
+        if name not in current:
+            for stale in [os.path.join(output_dir, name)] + _image_paths(output_dir, name):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    continue
+            removed += 1
+
+    _write(os.path.join(output_dir, INDEX_PAGE), index_page(index, keys, plants, pages))
+    # Pages whose images failed stay out, so they are retried on the next run
+    manifest = {pages[key]: hashes[key] for key in keys if pages[key] not in failed}
+    _write(manifest_path, json.dumps(manifest, indent=1, sort_keys=True))
+    return len(todo), len(keys) - len(todo), removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a cost analysis page for every BU/Season/Region/Potato.")
+    parser.add_argument('input', nargs='?', default='potato_data.xlsx',
+                        help="potato_data.xlsx-style workbook or potato_sales.csv-style CSV")
+    parser.add_argument('-o', '--output', default='reports', help="output directory")
+    parser.add_argument('--plants', nargs='+', help="plants to compare (default: every plant in the input)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--images', action='store_true', help="also write PNG charts (needs kaleido)")
+    parser.add_argument('--force', action='store_true', help="render every page even if unchanged")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rendered, skipped, removed = generate_reports(args.input, args.output, args.plants, args.workers, args.images,
+                                                  args.force)
+    print(f"{rendered} rendered, {skipped} unchanged, {removed} removed in {time.perf_counter() - start:.1f} s "
+          f"-> {os.path.abspath(os.path.join(args.output, INDEX_PAGE))}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
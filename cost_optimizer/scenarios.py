@@ -0,0 +1,234 @@
+from dataclasses import dataclass
+
+from cost_optimizer.schema import COMPONENT_COLUMNS, plant_columns
+
+TRANSPORT = 'Transportation'
+
+# Cap on simultaneously materialized scenario costs (scenarios x lots x plants)
+MAX_CHUNK_CELLS = 262144
+# Fewest scenarios per chunk; lots are split into blocks to keep to it
+MIN_SCENARIO_CHUNK = 256
+
+SAVINGS_BINS = 50
+
+
+@dataclass(frozen=True)
+class Shock:
+    # Relative change applied to a cost component, e.g. low=-0.1, high=0.2 for -10%..+20%.
+    # For 'normal' the range is read as a 95% interval around its midpoint.
+    low: float = 0.0
+    high: float = 0.0
+    distribution: str = 'uniform'
+
+    def sample(self, rng, size):
+        if self.distribution == 'uniform':
+            return rng.uniform(self.low, self.high, size)
+        if self.distribution == 'triangular':
+            if self.low == self.high:
+                return rng.uniform(self.low, self.high, size)
+            return rng.triangular(self.low, (self.low + self.high) / 2, self.high, size)
+        if self.distribution == 'normal':
+            return rng.normal((self.low + self.high) / 2, (self.high - self.low) / 3.92, size)
+        raise ValueError(f"Unknown distribution {self.distribution!r}")
+
+
+@dataclass(frozen=True)
+class SavingsHistogram:
+    # Fixed-bin counts of the selected plant's cost minus the cheapest plant's cost,
+    # plus exact running totals; percentiles are interpolated from the bins
+    counts: object  # (bins,) scenario x lot counts
+    edges: object  # (bins + 1,) bin edges in $/ton
+    total: int
+    sum: float
+    minimum: float
+    maximum: float
+    positive: int
+
+    def percentile(self, q):
+        import numpy as np
+
+        if not self.total:
+            return float('nan')
+        # Scenarios where the selected plant is already cheapest save exactly 0;
+        # they sit in the first bin as a point mass rather than spread across it
+        target = q / 100 * self.total
+        zeros = self.total - self.positive
+        if target <= zeros:
+            value = 0.0
+        else:
+            counts = self.counts.copy()
+            counts[0] -= zeros
+            cumulative = np.cumsum(counts)
+            target -= zeros
+            i = min(int(np.searchsorted(cumulative, target)), len(counts) - 1)
+            before = cumulative[i - 1] if i else 0
+            within = (target - before) / counts[i] if counts[i] else 0.0
+            value = self.edges[i] + within * (self.edges[i + 1] - self.edges[i])
+        return float(min(max(value, self.minimum), self.maximum))
+
+    def summary(self, percentiles=(5, 50, 95)):
+        if not self.total:
+            return {}
+        summary = {'mean': self.sum / self.total}
+        for q in percentiles:
+            summary[f'p{q}'] = self.percentile(q)
+        summary['prob_positive'] = self.positive / self.total
+        return summary
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    plants: list
+    n_scenarios: int
+    prob_cheapest: object  # (lots, plants) share of scenarios in which each plant is cheapest
+    expected_cost: object  # (lots, plants) mean scenario cost
+    savings: SavingsHistogram | None  # over every scenario and lot, for the selected plant
+
+    def savings_summary(self, percentiles=(5, 50, 95)):
+        if self.savings is None:
+            return {}
+        return self.savings.summary(percentiles)
+
+
+def _cost_parts(lots, plants):
+    import numpy as np
+
+    plants, consumption, transport = plant_columns(lots, plants)
+    costs = lots[consumption].to_numpy(dtype=float)
+    components = lots[COMPONENT_COLUMNS].to_numpy(dtype=float)
+    transport_costs = lots[transport].to_numpy(dtype=float)
+
+    # Whatever the components and transport do not explain stays fixed
+    residual = costs - components.sum(axis=1, keepdims=True) - transport_costs
+    return plants, np.nan_to_num(residual), components, transport_costs
+
+
+def _savings_bound(residual, transport_costs, transport_factors, selected):
+    # Largest possible saving over the sampled transport factors, so the bins are fixed up front
+    import numpy as np
+
+    low = transport_costs * transport_factors.min(axis=0)
+    high = transport_costs * transport_factors.max(axis=0)
+    with np.errstate(invalid='ignore'):
+        dearest = residual[:, selected] + np.fmax(low[:, selected], high[:, selected])
+        cheapest = np.nanmin(np.where(np.isnan(low), np.inf, residual + np.fmin(low, high)), axis=1)
+        spread = dearest - cheapest
+    bound = np.where(np.isnan(spread), -np.inf, spread).max() if len(spread) else np.nan
+    return float(bound) if np.isfinite(bound) and bound > 0 else 1.0
+
+
+def simulate(lots, shocks, n_scenarios=10_000, selected_plant=None, plants=None, seed=0):
+    """Evaluate lot costs per plant under randomly shocked cost components.
+
+    shocks maps a component column (or 'Transportation') to a Shock. Component
+    shocks are shared by every lot and plant in a scenario; transportation is
+    shocked independently per plant.
+    """
+    import numpy as np
+
+    unknown = set(shocks) - set(COMPONENT_COLUMNS) - {TRANSPORT}
+    if unknown:
+        raise ValueError(f"Unknown cost components: {sorted(unknown)}")
+
+    plants, residual, components, transport_costs = _cost_parts(lots, plants)
+    n_lots, n_plants = transport_costs.shape
+    rng = np.random.default_rng(seed)
+
+    # (scenarios, components) and (scenarios, plants) multipliers
+    component_factors = np.ones((n_scenarios, len(COMPONENT_COLUMNS)))
+    for k, column in enumerate(COMPONENT_COLUMNS):
+        if column in shocks:
+            component_factors[:, k] += shocks[column].sample(rng, n_scenarios)
+    transport_factors = np.ones((n_scenarios, n_plants))
+    if TRANSPORT in shocks:
+        transport_factors += shocks[TRANSPORT].sample(rng, (n_scenarios, n_plants))
+
+    # Shared components add the same amount to every plant of a lot, so they move
+    # expected costs but never which plant is cheapest or the savings
+    expected_cost = (residual + (component_factors.mean(axis=0) @ np.nan_to_num(components).T)[:, None]
+                     + transport_costs * transport_factors.mean(axis=0))
+
+    selected = plants.index(selected_plant) if selected_plant is not None else None
+    wins = np.zeros((n_lots, n_plants), dtype=np.int64)
+    savings = None
+    if selected is not None:
+        edges = np.linspace(0.0, _savings_bound(residual, transport_costs, transport_factors, selected),
+                            SAVINGS_BINS + 1)
+        counts = np.zeros(SAVINGS_BINS, dtype=np.int64)
+        total = positive = 0
+        total_sum, minimum, maximum = 0.0, np.inf, -np.inf
+
+    # Plants without a transport cost can never be cheapest
+    base = residual + np.where(np.isnan(transport_costs), np.inf, 0.0)
+    transport_costs = np.nan_to_num(transport_costs)
+    reachable = np.isfinite(base).any(axis=1)
+    if selected is not None:
+        # Lots the selected plant cannot serve have no savings to report
+        priced = np.isfinite(base[:, selected])
+        inverse_width = SAVINGS_BINS / edges[-1]
+
+    # Blocks of lots keep every chunk to at least MIN_SCENARIO_CHUNK scenarios however many lots there are
+    lot_block = max(1, min(n_lots, MAX_CHUNK_CELLS // (n_plants * MIN_SCENARIO_CHUNK)))
+    chunk = max(1, min(n_scenarios, MAX_CHUNK_CELLS // (lot_block * n_plants)))
+    # (plants, chunk, lots) scenario costs and (chunk, lots) scratch, reused so each step writes in place
+    costs = np.empty((n_plants, chunk, lot_block))
+    cheapest_cost = np.empty((chunk, lot_block))
+    won, taken = (np.empty((chunk, lot_block), dtype=bool) for _ in range(2))
+    for lot_start in range(0, n_lots, lot_block):
+        lot_stop = min(lot_start + lot_block, n_lots)
+        block_base = np.ascontiguousarray(base[lot_start:lot_stop].T)
+        block_transport = np.ascontiguousarray(transport_costs[lot_start:lot_stop].T)
+        for start in range(0, n_scenarios, chunk):
+            stop = min(start + chunk, n_scenarios)
+            rows, cols = stop - start, lot_stop - lot_start
+            costs_ = costs[:, :rows, :cols]
+            cheapest_cost_, won_, taken_ = (buffer[:rows, :cols] for buffer in (cheapest_cost, won, taken))
+            # A running minimum over the few plants, less the shared components, is
+            # cheaper than reducing a (chunk, lots, plants) array over its last axis
+            factors = np.ascontiguousarray(transport_factors[start:stop].T)
+            for j in range(n_plants):
+                np.multiply(factors[j][:, None], block_transport[j], out=costs_[j])
+                costs_[j] += block_base[j]
+                if j == 0:
+                    cheapest_cost_[...] = costs_[j]
+                else:
+                    np.minimum(cheapest_cost_, costs_[j], out=cheapest_cost_)
+            # Ties go to the first plant, as with argmin
+            taken_.fill(False)
+            for j in range(n_plants):
+                np.equal(costs_[j], cheapest_cost_, out=won_)
+                np.greater(won_, taken_, out=won_)
+                taken_ |= won_
+                wins[lot_start:lot_stop, j] += np.count_nonzero(won_, axis=0)
+            if selected is None:
+                continue
+
+            # Never negative, since the selected plant is one of those minimized over
+            values = np.subtract(costs_[selected], cheapest_cost_, out=costs_[selected])
+            block_priced = priced[lot_start:lot_stop]
+            if not block_priced.all():
+                values = values[:, block_priced]
+            if not values.size:
+                continue
+            bins = (values * inverse_width).astype(np.intp).ravel()
+            np.minimum(bins, SAVINGS_BINS - 1, out=bins)
+            counts += np.bincount(bins, minlength=SAVINGS_BINS)
+            total += values.size
+            positive += int(np.count_nonzero(values))
+            total_sum += float(values.sum())
+            minimum = min(minimum, float(values.min()))
+            maximum = max(maximum, float(values.max()))
+
+    # Lots no plant can serve count toward none
+    wins[~reachable] = 0
+
+    if selected is not None:
+        savings = SavingsHistogram(counts, edges, total, total_sum, minimum, maximum, positive)
+
+    return ScenarioResult(
+        plants=plants,
+        n_scenarios=n_scenarios,
+        prob_cheapest=wins / n_scenarios,
+        expected_cost=expected_cost,
+        savings=savings,
+    )
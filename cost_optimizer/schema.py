@@ -0,0 +1,125 @@
+import functools
+import re
+from dataclasses import dataclass
+
+# Plants in the shipped data; datasets with other plants are discovered from their headers
+PLANTS = ['Channo', 'Pune', 'Kolkata', 'UP']
+
+# Plant the dashboards preselect when the data has it
+DEFAULT_PLANT = 'Pune'
+
+KEY_COLUMNS = ['BU', 'Season', 'Region', 'Potato']
+
+COMPONENT_COLUMNS = ['Buying Rate $/Ton', 'Plant Loss $/Ton', 'Cold Store Loss $/Ton', 'Leno Bag and Others $/Ton']
+
+CONSUMPTION_PREFIX = 'Consumption_Cost_'
+TRANSPORT_PATTERN = re.compile(r'Transportation cost (.+)')
+
+# Long layout columns
+LOT = 'Lot'
+PLANT = 'Plant'
+CONSUMPTION_COST = 'Consumption Cost'
+TRANSPORT_COST = 'Transport Cost'
+
+
+@dataclass(frozen=True)
+class PlantSchema:
+    plants: tuple
+    consumption: dict
+    transport: dict
+
+    def columns(self, plants=None):
+        plants = self.plants if plants is None else plants
+        try:
+            return list(plants), [self.consumption[p] for p in plants], [self.transport[p] for p in plants]
+        except KeyError as e:
+            raise KeyError(f"No cost columns for plant {e.args[0]!r}") from None
+
+
+@functools.lru_cache(maxsize=64)
+def _discover(columns):
+    from cost_optimizer.streaming import STATS
+
+    # Transport headers name every plant; headers may carry trailing padding,
+    # e.g. 'Transportation cost Kolkata            '
+    stat_suffixes = tuple(f' ({stat})' for stat in STATS)
+    transport = {}
+    for col in columns:
+        match = TRANSPORT_PATTERN.fullmatch(col.strip()) if isinstance(col, str) else None
+        # Skip the per-stat columns of streaming aggregates
+        if match and not match.group(1).endswith(stat_suffixes):
+            transport.setdefault(match.group(1), col)
+
+    # potato_sales.csv uses 'Consumption_Cost_<plant>', the cleaned workbook uses the plant name
+    names = set(columns)
+    consumption = {}
+    for plant in transport:
+        for name in (CONSUMPTION_PREFIX + plant, plant):
+            if name in names:
+                consumption[plant] = name
+                break
+
+    plants = tuple(plant for plant in transport if plant in consumption)
+    return PlantSchema(plants, consumption, {plant: transport[plant] for plant in plants})
+
+
+def plant_schema(df):
+    """Plants and their cost columns, discovered from the headers.
+
+    Discovery runs once per distinct set of headers, so the lookups below are
+    dictionary hits on every rerun rather than scans over the columns.
+    """
+    return _discover(tuple(df.columns))
+
+
+def consumption_column(df, plant):
+    try:
+        return plant_schema(df).consumption[plant]
+    except KeyError:
+        raise KeyError(f"No consumption cost column for plant {plant!r}") from None
+
+
+def transport_column(df, plant):
+    try:
+        return plant_schema(df).transport[plant]
+    except KeyError:
+        raise KeyError(f"No transportation cost column for plant {plant!r}") from None
+
+
+def plant_columns(df, plants=None):
+    # plants=None means every plant found in the data, in column order
+    return plant_schema(df).columns(plants)
+
+
+def long_costs(df, plants=None, consumption=None, transport=None):
+    """Reshape per-plant cost columns into one (lot, plant) row each.
+
+    Rows are plant-major: plant j's costs for every lot sit at rows
+    j*n_lots .. (j+1)*n_lots-1, so building the table is a concatenation of
+    columns and reshape(n_plants, n_lots) gives the cost matrix back. 'Lot' is
+    the row position in df and 'Plant' a categorical in plant order.
+    consumption/transport override the columns read, e.g. with streaming
+    aggregate stat columns.
+    """
+    import numpy as np
+    import pandas as pd
+
+    plants, default_consumption, default_transport = plant_columns(df, plants)
+    consumption = default_consumption if consumption is None else consumption
+    transport = default_transport if transport is None else transport
+
+    n_lots, n_plants = len(df), len(plants)
+    return pd.DataFrame({
+        LOT: np.tile(np.arange(n_lots, dtype=np.int64), n_plants),
+        PLANT: pd.Categorical.from_codes(np.repeat(np.arange(n_plants, dtype=np.int16), n_lots), categories=plants),
+        CONSUMPTION_COST: _concat_columns(df, consumption),
+        TRANSPORT_COST: _concat_columns(df, transport),
+    })
+
+
+def _concat_columns(df, columns):
+    import numpy as np
+
+    if not columns:
+        return np.empty(0, dtype=np.float64)
+    return np.concatenate([df[col].to_numpy(dtype=np.float64) for col in columns])
@@ -0,0 +1,359 @@
+import argparse
+import asyncio
+import collections
+import json
+import math
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from cost_optimizer.hierarchy import LEVELS, selection_prefix
+from cost_optimizer.schema import COMPONENT_COLUMNS, KEY_COLUMNS, plant_schema
+from cost_optimizer.shared import SharedDataset
+from cost_optimizer.streaming import column_mean
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Single-lot requests arriving within this window share one vectorized computation
+DEFAULT_WINDOW_MS = 2.0
+MAX_BATCH = 4096
+DEFAULT_CACHE_SIZE = 4096
+
+# Query parameter for each hierarchy level
+PARAMS = dict(zip(('bu', 'season', 'region', 'potato'), LEVELS))
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(value):
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def recommend_rows(frame, rows, plants=None):
+    """Destination plant and per-plant cost and savings for the given row positions, in one pass."""
+    from cost_optimizer.batch import best_plants, cost_matrices
+
+    lots = frame.iloc[rows]
+    plants, costs, transport_costs = cost_matrices(lots, plants)
+    destination, min_cost, tie_count = best_plants(costs)
+    keys = lots[[col for col in KEY_COLUMNS if col in lots.columns]].astype(object).to_numpy()
+
+    results = []
+    for i in range(len(lots)):
+        results.append({
+            'lot': dict(zip(KEY_COLUMNS, keys[i])),
+            'destination_plant': plants[destination[i]] if destination[i] >= 0 else None,
+            'tied_plants': int(tie_count[i]),
+            'min_cost': _number(min_cost[i]),
+            'costs': {plant: _number(costs[i, j]) for j, plant in enumerate(plants)},
+            'savings': {plant: _number(costs[i, j] - min_cost[i]) for j, plant in enumerate(plants)},
+            'transport_costs': {plant: _number(transport_costs[i, j]) for j, plant in enumerate(plants)},
+        })
+    return results
+
+
+def cost_breakdown(filtered, plants=None):
+    # Mean consumption and transport cost per plant plus the shared cost components
+    schema = plant_schema(filtered)
+    plants, consumption, transport = schema.columns(plants)
+    return {
+        'rows': len(filtered),
+        'plants': {
+            plant: {
+                'consumption_cost': _number(column_mean(filtered, consumption_col)),
+                'transport_cost': _number(column_mean(filtered, transport_col)),
+            }
+            for plant, consumption_col, transport_col in zip(plants, consumption, transport)
+        },
+        'components': {col: _number(column_mean(filtered, col)) for col in COMPONENT_COLUMNS if col in filtered},
+    }
+
+
+class LotBatcher:
+    """Coalesces single-lot lookups made within a short window into one call."""
+
+    def __init__(self, compute, window=DEFAULT_WINDOW_MS / 1000, max_batch=MAX_BATCH):
+        self.compute = compute
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.items = 0
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await asyncio.to_thread(self.compute, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class CostService:
+    def __init__(self, path, kind=None, window_ms=DEFAULT_WINDOW_MS, cache_size=DEFAULT_CACHE_SIZE):
+        if kind is None:
+            kind = 'potato_data' if path.lower().endswith(('.xlsx', '.xls')) else 'sales'
+        self.dataset = SharedDataset(path, kind)
+        self.batcher = LotBatcher(self._recommend_lots, window_ms / 1000)
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self.requests = 0
+        self.cache_hits = 0
+        self._refresh = None
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('GET', '/stats'): self.stats,
+            ('GET', '/options'): self.options,
+            ('GET', '/recommend'): self.recommend,
+            ('GET', '/recommend/bulk'): self.recommend_bulk,
+            ('POST', '/recommend/bulk'): self.recommend_lots,
+            ('GET', '/breakdown'): self.breakdown,
+        }
+
+    async def snapshot(self):
+        """The snapshot to answer a request from, without rebuilding on the event loop.
+
+        A changed source file is reloaded in a worker thread while requests keep
+        using the previous snapshot; only the very first load is waited for.
+        """
+        snapshot = self.dataset.latest()
+        if snapshot is None:
+            return await asyncio.to_thread(self.dataset.current)
+        if self._refresh is None and self.dataset.stale():
+            self._refresh = asyncio.ensure_future(asyncio.to_thread(self.dataset.refresh))
+            self._refresh.add_done_callback(self._refreshed)
+        return snapshot
+
+    def _refreshed(self, task):
+        self._refresh = None
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Reloading {self.dataset.path} failed: {task.exception()!r}", file=sys.stderr)
+
+    @staticmethod
+    def _recommend_lots(lots):
+        # lots are (snapshot, key) pairs, each key checked against its own snapshot.
+        # Like the dashboard, a lot is represented by its first row.
+        results = [None] * len(lots)
+        by_snapshot = {}
+        for i, (snapshot, key) in enumerate(lots):
+            by_snapshot.setdefault(id(snapshot), (snapshot, []))[1].append((i, key))
+        for snapshot, items in by_snapshot.values():
+            rows = [snapshot.index.row_range(*key)[0] for _, key in items]
+            for (i, _), result in zip(items, recommend_rows(snapshot.frame, rows)):
+                results[i] = result
+        return results
+
+    @staticmethod
+    def _selection(query):
+        return selection_prefix(query.get(param, '') for param in PARAMS)
+
+    def _lot_key(self, snapshot, values):
+        key = selection_prefix(values)
+        if len(key) != len(LEVELS):
+            raise HTTPError(400, f"a lot needs all of {', '.join(PARAMS)}")
+        if key not in snapshot.index:
+            raise HTTPError(404, f"no lot {'/'.join(key)}")
+        return key
+
+    async def health(self, snapshot, query, body):
+        return {'status': 'ok', 'rows': len(snapshot.frame), 'plants': list(plant_schema(snapshot.frame).plants)}
+
+    async def stats(self, snapshot, query, body):
+        return {
+            'requests': self.requests,
+            'cache_hits': self.cache_hits,
+            'cache_entries': len(self._cache),
+            'batches': self.batcher.batches,
+            'batched_lots': self.batcher.items,
+        }
+
+    async def options(self, snapshot, query, body):
+        return {'options': snapshot.index.options(*self._selection(query))}
+
+    async def recommend(self, snapshot, query, body):
+        key = self._lot_key(snapshot, [query.get(param, '') for param in PARAMS])
+        result = await self.batcher.submit((snapshot, key))
+        plant = query.get('plant')
+        if plant:
+            if plant not in result['costs']:
+                raise HTTPError(400, f"unknown plant {plant!r}")
+            result = dict(result, selected_plant=plant, savings_vs_selected=result['savings'][plant])
+        return result
+
+    async def recommend_bulk(self, snapshot, query, body):
+        # Every row under a BU/Season/Region/Potato prefix in one vectorized call
+        start, stop = snapshot.index.row_range(*self._selection(query))
+        results = await asyncio.to_thread(recommend_rows, snapshot.frame, list(range(start, stop)))
+        return {'count': len(results), 'recommendations': results}
+
+    async def recommend_lots(self, snapshot, query, body):
+        try:
+            lots = json.loads(body or b'{}')['lots']
+            values = [[lot.get(param, '') for param in PARAMS] for lot in lots]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise HTTPError(400, 'expected {"lots": [{"bu": ..., "season": ..., "region": ..., "potato": ...}]}')
+        lots = [(snapshot, self._lot_key(snapshot, lot)) for lot in values]
+        results = await asyncio.to_thread(self._recommend_lots, lots)
+        return {'count': len(results), 'recommendations': results}
+
+    async def breakdown(self, snapshot, query, body):
+        selection = self._selection(query)
+        if selection not in snapshot.index:
+            raise HTTPError(404, f"no rows for {'/'.join(selection) or 'the whole dataset'}")
+        return dict(cost_breakdown(snapshot.index.select(*selection)), selection=dict(zip(PARAMS, selection)))
+
+    async def dispatch(self, method, target, body):
+        self.requests += 1
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                return 405, _encode({'error': f"{method} not allowed on {url.path}"})
+            return 404, _encode({'error': f"no route {url.path}"})
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        # One snapshot per request; responses are cached per data version, route and filter key
+        try:
+            snapshot = await self.snapshot()
+        except Exception as e:
+            # Only reachable before the first snapshot has loaded
+            return 500, _encode({'error': f"{type(e).__name__}: {e}"})
+        cacheable = method == 'GET' and url.path not in ('/health', '/stats') and self.cache_size
+        if cacheable:
+            cache_key = (snapshot.key, url.path, tuple(sorted(query.items())))
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return 200, cached
+
+        try:
+            payload = _encode(await handler(snapshot, query, body))
+        except HTTPError as e:
+            return e.status, _encode({'error': str(e)})
+        except Exception as e:
+            return 500, _encode({'error': f"{type(e).__name__}: {e}"})
+
+        if cacheable:
+            self._cache[cache_key] = payload
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return 200, payload
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive; enough for local JSON clients
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, _encode({'error': 'malformed request line'}), False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, 400, _encode({'error': 'malformed Content-Length'}), False)
+                    break
+                body = await reader.readexactly(length)
+
+                status, payload = await self.dispatch(method.upper(), target, body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+
+
+def _encode(payload):
+    return json.dumps(payload, default=str).encode()
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serving cost optimizer API on http://{host}:{port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve destination-plant recommendations over a local HTTP API.")
+    parser.add_argument('data', nargs='?', default='potato_sales.csv',
+                        help="potato_data.xlsx-style workbook or potato_sales.csv-style CSV")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--window-ms', type=float, default=DEFAULT_WINDOW_MS,
+                        help="how long single-lot requests wait to be batched together")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help="cached responses (0 disables)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    service = CostService(args.data, window_ms=args.window_ms, cache_size=args.cache_size)
+    snapshot = service.dataset.current()
+    print(f"{snapshot.info.summary()}; ready in {(time.perf_counter() - start) * 1000:.0f} ms", file=sys.stderr)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
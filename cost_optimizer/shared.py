@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from cost_optimizer.hierarchy import HierarchyIndex
+from cost_optimizer.loader import (LoadInfo, _has_parquet, _sidecar_prefix, _write_sidecar, load_frame, sidecar_path,
+                                   source_key)
+from cost_optimizer.schema import KEY_COLUMNS
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    key: tuple
+    frame: object
+    index: HierarchyIndex
+    info: LoadInfo
+    table: object = None
+
+
+def _write_arrow(df, path):
+    import pyarrow as pa
+
+    # Dictionary-encode the text keys so each distinct value is stored once
+    df = df.astype({col: 'category' for col in KEY_COLUMNS if col in df.columns and df[col].dtype == object})
+    # The row labels are the original row numbers, which the index needs to keep options in data order
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _map_arrow(path):
+    import pyarrow as pa
+
+    # Numeric columns come back as read-only views of the mapped file; the OS
+    # page cache backs them, so other server processes share the same pages
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table, table.to_pandas(split_blocks=True)
+
+
+def open_snapshot(path, kind, key=None):
+    start = time.perf_counter()
+    key = key or source_key(path)
+    if not _has_parquet():
+        df, info = load_frame(path, kind)
+        index = HierarchyIndex(df)
+        return Snapshot(key, index.frame, index, info)
+
+    # The Arrow file holds the rows in index order, so the index can point at it directly
+    arrow_kind = f'{kind}_shared'
+    arrow_path = sidecar_path(path, arrow_kind, '.arrow')
+    if os.path.exists(arrow_path):
+        try:
+            table, frame = _map_arrow(arrow_path)
+        except (OSError, ValueError, TypeError):
+            # Unreadable: rebuild it from the source below
+            pass
+        else:
+            # No Parquet read: the index is built over the mapped rows without copying them
+            index = HierarchyIndex(frame, positions=frame.index.to_numpy())
+            info = LoadInfo(path, arrow_path, True, time.perf_counter() - start, len(frame))
+            return Snapshot(key, frame, index, info, table)
+
+    df, info = load_frame(path, kind)
+    index = HierarchyIndex(df)
+    del df
+    try:
+        _write_sidecar(index.frame, arrow_path, _sidecar_prefix(path, arrow_kind), write=_write_arrow)
+        table, frame = _map_arrow(arrow_path)
+    except (OSError, ValueError, TypeError):
+        # Sharing is best effort; fall back to the in-memory frame
+        return Snapshot(key, index.frame, index, info)
+
+    index.frame = frame
+    info = LoadInfo(path, arrow_path, False, time.perf_counter() - start, len(frame))
+    return Snapshot(key, frame, index, info, table)
+
+
+class SharedDataset:
+    """One immutable snapshot of a dataset per process, shared by every session.
+
+    Readers take the current snapshot without locking. When the source file
+    changes, one caller builds the new version while the others keep reading
+    the old one, and the swap is a single attribute assignment.
+    """
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def latest(self):
+        # The snapshot readers are on, without checking the source file
+        return self._snapshot
+
+    def stale(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return True
+        try:
+            return snapshot.key != source_key(self.path)
+        except OSError:
+            # The file is briefly missing (e.g. deleted and rewritten); keep the current snapshot
+            return False
+
+    def current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.key == source_key(self.path):
+            return snapshot
+        return self.refresh(wait=snapshot is None)
+
+    def refresh(self, wait=True):
+        if not self._lock.acquire(blocking=wait):
+            # Another caller is already building the new version
+            return self._snapshot
+        try:
+            key = source_key(self.path)
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.key != key:
+                snapshot = open_snapshot(self.path, self.kind, key)
+                self._snapshot = snapshot
+            return snapshot
+        finally:
+            self._lock.release()
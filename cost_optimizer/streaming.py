@@ -0,0 +1,94 @@
+import os
+
+from cost_optimizer.schema import KEY_COLUMNS
+
+STREAMING_ENV = 'COST_OPTIMIZER_STREAMING'
+
+# Files above this size are aggregated in chunks instead of loaded whole
+STREAMING_THRESHOLD_BYTES = 256 * 1024 * 1024
+
+DEFAULT_CHUNKSIZE = 200_000
+
+ROWS = 'Rows'
+STATS = ('count', 'sum', 'min', 'max')
+_COMBINE = {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def stat_column(column, stat):
+    return f'{column} ({stat})'
+
+
+def should_stream(path):
+    # COST_OPTIMIZER_STREAMING=1 forces streaming, =0 disables it, unset decides by file size
+    setting = os.environ.get(STREAMING_ENV, '').strip().lower()
+    if setting in ('1', 'true', 'yes'):
+        return True
+    if setting in ('0', 'false', 'no'):
+        return False
+    return os.path.getsize(path) > STREAMING_THRESHOLD_BYTES
+
+
+def _aggregate_chunk(chunk, value_columns):
+    grouped = chunk.groupby(KEY_COLUMNS, sort=False)
+    import pandas as pd
+
+    stats = grouped[value_columns].agg(list(STATS))
+    return pd.concat([stats, grouped.size().rename((ROWS, 'count')).to_frame()], axis=1)
+
+
+def _combine(running, part):
+    import pandas as pd
+
+    if running is None:
+        return part
+    merged = pd.concat([running, part])
+    return merged.groupby(level=KEY_COLUMNS, sort=False).agg({col: _COMBINE[col[1]] for col in merged.columns})
+
+
+def aggregate_csv(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Stream a sales CSV in chunks into per BU/Season/Region/Potato aggregates.
+
+    Memory is bounded by the number of groups, not the number of rows. The
+    result has one row per group with the group's mean for every numeric
+    column under its original name, plus '<column> (count|sum|min|max)'
+    columns and a 'Rows' count so callers can re-aggregate exactly.
+    """
+    import numpy as np
+    import pandas as pd
+
+    running = None
+    value_columns = None
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunk.columns = chunk.columns.str.strip()
+        if value_columns is None:
+            value_columns = [col for col in chunk.select_dtypes('number').columns if col not in KEY_COLUMNS]
+        running = _combine(running, _aggregate_chunk(chunk, value_columns))
+
+    if running is None:
+        return pd.DataFrame(columns=KEY_COLUMNS + [ROWS])
+
+    # Build every column first and assemble once; wide plant sets would fragment the frame otherwise
+    columns = {ROWS: running[(ROWS, 'count')].to_numpy()}
+    for col in value_columns:
+        count = running[(col, 'count')].to_numpy()
+        total = running[(col, 'sum')].to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            columns[col] = np.where(count > 0, total / count, np.nan)
+    for col in value_columns:
+        for stat in STATS:
+            columns[stat_column(col, stat)] = running[(col, stat)].to_numpy()
+    return pd.concat([running.index.to_frame(index=False), pd.DataFrame(columns)], axis=1)
+
+
+def column_mean(frame, column):
+    # Row-weighted mean that works on raw rows and on aggregate_csv output alike
+    if stat_column(column, 'sum') in frame.columns:
+        count = frame[stat_column(column, 'count')].sum()
+        return frame[stat_column(column, 'sum')].sum() / count if count else float('nan')
+    return frame[column].mean()
+
+
+def column_min(frame, column):
+    if stat_column(column, 'min') in frame.columns:
+        return frame[stat_column(column, 'min')].min()
+    return frame[column].min()
@@ -0,0 +1,35 @@
+import streamlit as st
+
+
+def _whole_page(func=None, **kwargs):
+    # Streamlit without fragment support reruns the whole page instead
+    if func is None:
+        return lambda f: f
+    return func
+
+
+# st.fragment (Streamlit 1.37+) or st.experimental_fragment (1.33+)
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or _whole_page
+
+
+def stage_profiler(app):
+    # Opt in with COST_OPTIMIZER_PROFILE=1 (or =memory for tracemalloc) or ?profile=1 in the URL.
+    # tracemalloc slows every session in the process, so the URL can only ask for timings.
+    from cost_optimizer.instrument import profile_mode, stage_timer
+
+    mode = profile_mode(st.query_params.get('profile', ''))
+    if mode == 'memory':
+        mode = 'time'
+    return stage_timer(app, mode or None)
+
+
+def profile_panel(timer):
+    # Log this rerun's stages and show them in a collapsible breakdown
+    if not timer.enabled:
+        return
+    import pandas as pd
+
+    timer.log()
+    stages = pd.DataFrame(timer.records)
+    with st.expander(f"Stage timings ({stages['wall_ms'].sum():.1f} ms)"):
+        st.dataframe(stages, hide_index=True)
@@ -1,19 +1,42 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 
-# Load dataset
-data = pd.read_csv('potato_sales.csv')
+from cost_optimizer.allocation import allocate
+from cost_optimizer.charts import cheapest_probability_bar, sankey_figure, savings_histogram
+from cost_optimizer.core import plant_costs, relocation_summary, sankey_data
+from cost_optimizer.scenarios import TRANSPORT, Shock, simulate
+from cost_optimizer.schema import COMPONENT_COLUMNS, DEFAULT_PLANT, plant_schema
+from cost_optimizer.shared import SharedDataset
+from cost_optimizer.streaming import should_stream
+from cost_optimizer.ui import fragment, profile_panel, stage_profiler
 
 # Set page configuration for wide mode
 st.set_page_config(layout="wide")
 
+# Opt-in per-stage timings of this rerun (COST_OPTIMIZER_PROFILE=1 or ?profile=1)
+timer = stage_profiler('potato.py')
+
+# Load dataset (parsed once, re-parsed only when the file changes). Every session
+# reads the same memory-mapped snapshot and its BU -> Season -> Region -> Potato
+# index; a changed file is swapped in as a new snapshot.
+@st.cache_resource
+def shared_dataset(path, kind):
+    return SharedDataset(path, kind)
+
+data_path = 'potato_sales.csv'
+with timer.stage('load_data'):
+    # Histories too large for memory are streamed in chunks into per BU/Season/Region/Potato aggregates
+    kind = 'sales_aggregates' if should_stream(data_path) else 'sales'
+    snapshot = shared_dataset(data_path, kind).current()
+data, index, load_info = snapshot.frame, snapshot.index, snapshot.info
+
 col1, col2 = st.columns([7,1])  # Adjust the width ratio to control spacing
 with col2:
     st.image('ibm_logo.png', width=80)  # Adjust width as needed
 
 with col1:
     st.image('pep_logo.jpg', width=100)  # Adjust width as needed
+    st.caption(load_info.summary())
 
 # Initialize session state for node selections
 if 'selected_bu' not in st.session_state:
@@ -25,106 +48,189 @@ if 'selected_region' not in st.session_state:
 if 'selected_potato' not in st.session_state:
     st.session_state.selected_potato = None
 
-# Check column names and adjust if necessary
-def get_adjusted_column_name(df, name):
-    # Find closest match for column names
-    matches = [col for col in df.columns if name in col]
-    return matches[0] if matches else None
-
-# Function to generate nodes and links for the Sankey diagram
-def generate_sankey_data(filtered_data):
-    nodes = []
-    links = []
-
-    # Initial BU nodes
-    if not st.session_state.selected_bu:
-        bu_nodes = filtered_data['BU'].unique()
-        nodes.extend(bu_nodes)
-        return nodes, links
-
-    # BU selected, show Seasons
-    if st.session_state.selected_bu:
-        bu_nodes = [st.session_state.selected_bu]
-        nodes.extend(bu_nodes)
-        bu_node_index = 0
-        
-        seasons = filtered_data['Season'].unique()
-        season_node_indices = {season: i + 1 for i, season in enumerate(seasons)}
-        nodes.extend(seasons)
-        
-        for season in seasons:
-            links.append(dict(source=bu_node_index, target=season_node_indices[season], value=1))
-        
-        if st.session_state.selected_season:
-            regions = filtered_data[filtered_data['Season'] == st.session_state.selected_season]['Region'].unique()
-            region_node_indices = {region: i + 1 + len(seasons) for i, region in enumerate(regions)}
-            nodes.extend(regions)
-            
-            for region in regions:
-                links.append(dict(source=season_node_indices[st.session_state.selected_season], target=region_node_indices[region], value=1))
-            
-            if st.session_state.selected_region:
-                potatoes = filtered_data[filtered_data['Region'] == st.session_state.selected_region]['Potato'].unique()
-                potato_node_indices = {potato: i + 1 + len(seasons) + len(regions) for i, potato in enumerate(potatoes)}
-                nodes.extend(potatoes)
-                
-                for potato in potatoes:
-                    links.append(dict(source=region_node_indices[st.session_state.selected_region], target=potato_node_indices[potato], value=1))
-                
-                if st.session_state.selected_potato:
-                    plants = ['Pune Plant', 'Channo Plant', 'Kolkata Plant', 'UP Plant']
-                    plant_node_indices = {plant: i + 1 + len(seasons) + len(regions) + len(potatoes) for i, plant in enumerate(plants)}
-                    nodes.extend(plants)
-                    
-                    for plant in plants:
-                        plant_name = plant.split()[0]  # Extract the plant name (e.g., 'Pune')
-                        consumption_column = f'Consumption_Cost_{plant_name}'
-                        if consumption_column in filtered_data.columns:
-                            avg_cost = filtered_data[filtered_data['Potato'] == st.session_state.selected_potato][consumption_column].mean()
-                            links.append(dict(source=potato_node_indices[st.session_state.selected_potato], target=plant_node_indices[plant], value=avg_cost))
-    
-    return nodes, links
-
-# Function to render the Sankey diagram
-def render_sankey(nodes, links):
-    fig = go.Figure(data=[go.Sankey(
-        node=dict(
-            pad=15,
-            thickness=20,
-            line=dict(color="black", width=0.5),
-            label=nodes
-        ),
-        link=dict(
-            source=[link['source'] for link in links],
-            target=[link['target'] for link in links],
-            value=[link['value'] for link in links],
-            color='rgba(0, 128, 255, 0.4)'
-        )
-    )])
-    
-    fig.update_layout(title_text="Consumption Cost Flow ", font_size=10)
-    return fig
+# Capacity-constrained allocation of every lot in a BU/Season, cached per input set
+@st.cache_data
+def solve_allocation(path, key, bu, season, volume, capacities):
+    return allocate(index.select(bu, season), dict(capacities), volume, plants)
+
+# Monte Carlo what-if results, cached per selection and parameter set
+@st.cache_data
+def run_scenarios(path, key, selection, shocks, n_scenarios, selected_plant):
+    shocks = {component: Shock(low, high, distribution) for component, low, high, distribution in shocks}
+    return simulate(index.select(*selection), shocks, n_scenarios, selected_plant, plants)
+
+# Plants found in the data's headers, in column order
+plants = list(plant_schema(data).plants)
+plant_labels = {plant: f'{plant} Plant' for plant in plants}
+
+# Figures are memoized per data version and selection, so reruns reuse them
+@st.cache_resource(max_entries=256)
+def sankey_chart(path, key, selection):
+    filtered = index.select(*selection)
+    return sankey_figure(*sankey_data(filtered, plants, *selection, plant_labels))
+
+@st.cache_resource(max_entries=64)
+def scenario_charts(path, key, selection, shocks, n_scenarios, selected_plant):
+    result = run_scenarios(path, key, selection, shocks, n_scenarios, selected_plant)
+    prob_fig = cheapest_probability_bar([plant_labels[plant] for plant in plants], result.prob_cheapest.mean(axis=0))
+    savings_fig = savings_histogram(result.savings.counts, result.savings.edges, plant_labels[selected_plant])
+    return prob_fig, savings_fig
+
+# The sections below rerun on their own when their widgets change, so picking a
+# plant or tweaking a scenario does not redraw the Sankey or reload the data
+@fragment
+@timer.section('insight_section')
+def insight_section(selection):
+    # Optimized result and insights
+    filtered_data = index.select(*selection)
+    st.subheader("**Optimized Result and Insight Generation**")
+    selected = st.selectbox("**Select Plant**", options=[''] + plants, format_func=lambda plant: plant_labels.get(plant, ''))
+    if selected:
+        selected_plant = plant_labels[selected]
+        with timer.stage('relocation_summary'):
+            summary = relocation_summary(filtered_data, selected, plants)
+        destination_plant = plant_labels[summary.destination_plant]
+
+        # Create insights DataFrame
+        with timer.stage('insight_table'):
+            insights_df = pd.DataFrame({
+                'BU': [st.session_state.selected_bu],
+                'Plant to Move': [selected_plant],
+                'Destination Plant': [destination_plant],
+                'Difference ($/Ton)': [summary.difference]
+            })
+
+            st.write(insights_df.to_html(index=False, border=0, classes='table table-striped'), unsafe_allow_html=True)
+        st.markdown("<br>", unsafe_allow_html=True)
+        if selected_plant == destination_plant:
+            st.write("The selected plant is already the lowest-cost option. No further cost optimization is possible.")
+        else:
+            st.write(f"At **{destination_plant}**, the transportation cost is **${summary.transportation_cost_destination:.2f}**/ton which is comparatively lower than the transportation cost of **{selected_plant}**.")
+            st.write(f"This comprehensive cost analysis highlights the potential savings by considering all aspects of production and transportation costs. In the Business Unit (BU) of **{st.session_state.selected_bu}**, relocating operations from **{selected_plant}** to **{destination_plant}** could lead to significant savings. The savings in cost will amount to the difference between the total costs at these two plants, considering factors like buying rate, plant loss, cold store loss, leno bag and other costs, and transportation cost.")
+            st.write(f"**Final Summary:** Based on the analysis, it is suggested to move the plant from **{selected_plant}** to **{destination_plant}** to achieve a cost savings of **${summary.difference:.2f}**/ton. This decision is derived from the detailed cost breakdown and comparison of total costs, ensuring a more cost-effective production process.")
+            st.write("Please note that this analysis is based on the provided data and theoretical assumptions. In a real-world scenario, additional factors such as infrastructure, labor costs, regulations, and other variables need to be considered for a comprehensive analysis and accurate predictions regarding plant relocation.")
+
+@fragment
+@timer.section('allocation_section')
+def allocation_section(selection):
+    selected_potato = selection[-1]
+
+    # Plant capacities make "everyone moves to the cheapest plant" infeasible, so
+    # solve the allocation of every lot in the selected season jointly
+    with st.expander("**Capacity-Constrained Allocation**"):
+        volume = st.number_input("**Volume per lot (Ton)**", min_value=0.0, value=100.0, step=10.0)
+        # Four capacity inputs per row, however many plants there are
+        capacity_cols = [col for _ in range(0, len(plants), 4) for col in st.columns(4)]
+        capacities = []
+        for plant, capacity_col in zip(plants, capacity_cols):
+            with capacity_col:
+                capacity = st.number_input(f"**{plant_labels[plant]} capacity (Ton)**", min_value=0.0, value=0.0,
+                                           step=100.0, help="0 means unlimited")
+            capacities.append((plant, capacity or None))
+
+        try:
+            with timer.stage('solve_allocation'):
+                allocation = solve_allocation(data_path, snapshot.key, st.session_state.selected_bu,
+                                              st.session_state.selected_season, volume, tuple(capacities))
+        except ValueError as e:
+            st.warning(str(e))
+        else:
+            plant_load = allocation.plant_load.reset_index().replace(float('inf'), float('nan'))
+            plant_load['Plant'] = plant_load['Plant'].map(plant_labels)
+            st.write(plant_load.to_html(index=False, border=0, classes='table table-striped', na_rep='-',
+                                        float_format='{:,.2f}'.format), unsafe_allow_html=True)
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.write(f"Total cost of the season plan is **${allocation.total_cost:,.2f}**, which is **${allocation.capacity_premium:,.2f}** above sending every lot to its cheapest plant.")
+
+            potato_plan = allocation.assignments[allocation.assignments['Potato'] == selected_potato]
+            for _, row in potato_plan.iterrows():
+                st.write(f"**{selected_potato}**: {row['Volume']:,.0f} ton to **{plant_labels[row['Plant']]}** at **${row['Cost $/Ton']:.2f}**/ton")
+
+@fragment
+@timer.section('scenario_section')
+def scenario_section():
+    st.subheader("What-if Scenarios")
+    selection = (st.session_state.selected_bu, st.session_state.selected_season,
+                 st.session_state.selected_region, st.session_state.selected_potato)
+    scenario_lots = index.select(*selection)
+    st.write(f"Simulating **{len(scenario_lots)}** lot(s) for the selection made in the Consumption Cost tab.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        distribution = st.selectbox("**Distribution**", options=['uniform', 'triangular', 'normal'])
+    with col2:
+        n_scenarios = st.select_slider("**Scenarios**", options=[1000, 5000, 10000, 20000, 50000], value=10000)
+    with col3:
+        scenario_plant = st.selectbox("**Current Plant**", options=plants, format_func=plant_labels.get,
+                                      index=plants.index(DEFAULT_PLANT) if DEFAULT_PLANT in plants else 0)
+
+    # Shock ranges in percent per cost component
+    shocks = []
+    shock_cols = st.columns(len(COMPONENT_COLUMNS) + 1)
+    for shock_col, component in zip(shock_cols, COMPONENT_COLUMNS + [TRANSPORT]):
+        with shock_col:
+            low, high = st.slider(f"**{component}** (%)", min_value=-50, max_value=50, value=(-10, 10))
+        shocks.append((component, low / 100, high / 100, distribution))
+
+    # A whole BU is only simulated on request; a narrower selection runs straight away
+    if not st.session_state.selected_season and len(scenario_lots):
+        if st.button("**Run scenarios for the whole BU**"):
+            st.session_state.scenario_bu_run = selection
+        if st.session_state.get('scenario_bu_run') != selection:
+            st.write("Select a Season in the Consumption Cost tab, or run the scenarios for every lot in the BU.")
+            return
+
+    if len(scenario_lots):
+        with timer.stage('run_scenarios'):
+            result = run_scenarios(data_path, snapshot.key, selection, tuple(shocks), n_scenarios,
+                                   scenario_plant)
+        prob_cheapest = result.prob_cheapest.mean(axis=0)
+        expected_cost = result.expected_cost.mean(axis=0)
+
+        with timer.stage('scenario_charts'):
+            prob_fig, savings_fig = scenario_charts(data_path, snapshot.key, selection, tuple(shocks),
+                                                    n_scenarios, scenario_plant)
+        with timer.stage('plotly_chart.scenarios'):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(prob_fig)
+            with col2:
+                st.plotly_chart(savings_fig)
+
+        scenario_table = pd.DataFrame({
+            'Plant': [plant_labels[plant] for plant in plants],
+            'P(Cheapest)': [f"{p:.1%}" for p in prob_cheapest],
+            'Expected Cost': [f"${cost:.2f} per ton" for cost in expected_cost],
+        })
+        st.write(scenario_table.to_html(index=False, border=0, classes='table table-striped'), unsafe_allow_html=True)
+        st.markdown("<br>", unsafe_allow_html=True)
+
+        summary = result.savings_summary()
+        st.write(f"Moving away from **{plant_labels[scenario_plant]}** saves **${summary['mean']:.2f}**/ton on average "
+                 f"(5th-95th percentile **${summary['p5']:.2f}** to **${summary['p95']:.2f}**/ton); "
+                 f"another plant is cheaper in **{summary['prob_positive']:.1%}** of scenarios.")
 
 # Streamlit app layout
 st.title("Agro Dashboard")
 
 # Define tabs with increased font size
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["**Consumption Cost**", "**Buying Rate**", "**Plant Loss**", "**Cold Store Loss**", "**Leno Bag & Others**"])
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["**Consumption Cost**", "**Buying Rate**", "**Plant Loss**", "**Cold Store Loss**", "**Leno Bag & Others**", "**What-if Scenarios**"])
 
 with tab1:
     st.subheader("**Consumption Cost ($/Ton)**")
 
     # Define filter options
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        bu_options = data['BU'].unique()
-        selected_bu = st.selectbox("**BU**", options=[''] + list(bu_options), index=bu_options.tolist().index('India') + 1)
-    with col2:
-        selected_season = st.selectbox("**Season**", options=[''] + list(data[data['BU'] == selected_bu]['Season'].unique()) if selected_bu else [])
-    with col3:
-        selected_region = st.selectbox("**Region**", options=[''] + list(data[data['Season'] == selected_season]['Region'].unique()) if selected_season else [])
-    with col4:
-        selected_potato = st.selectbox("**Potato**", options=[''] + list(data[data['Region'] == selected_region]['Potato'].unique()) if selected_region else [])
+    with timer.stage('filters'):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            bu_options = index.options()
+            selected_bu = st.selectbox("**BU**", options=[''] + bu_options, index=bu_options.index('India') + 1)
+        with col2:
+            selected_season = st.selectbox("**Season**", options=[''] + index.options(selected_bu) if selected_bu else [])
+        with col3:
+            selected_region = st.selectbox("**Region**", options=[''] + index.options(selected_bu, selected_season) if selected_season else [])
+        with col4:
+            selected_potato = st.selectbox("**Potato**", options=[''] + index.options(selected_bu, selected_season, selected_region) if selected_region else [])
 
     # Update session state based on selections
     st.session_state.selected_bu = selected_bu
@@ -133,74 +239,38 @@ with tab1:
     st.session_state.selected_potato = selected_potato
 
     # Filter data based on selections
-    filtered_data = data[
-        (data['BU'] == st.session_state.selected_bu if st.session_state.selected_bu else data['BU'].notna()) &
-        (data['Season'] == st.session_state.selected_season if st.session_state.selected_season else data['Season'].notna()) &
-        (data['Region'] == st.session_state.selected_region if st.session_state.selected_region else data['Region'].notna()) &
-        (data['Potato'] == st.session_state.selected_potato if st.session_state.selected_potato else data['Potato'].notna())
-    ]
-
-    # Generate Sankey data
-    nodes, links = generate_sankey_data(filtered_data)
+    selection = (st.session_state.selected_bu, st.session_state.selected_season,
+                 st.session_state.selected_region, st.session_state.selected_potato)
+    with timer.stage('select'):
+        filtered_data = index.select(*selection)
 
     # Layout for Sankey diagram and cost table
     col1, col2 = st.columns([2, 1])
     with col1:
         # Render Sankey diagram
-        sankey_fig = render_sankey(nodes, links)
-        st.plotly_chart(sankey_fig)
+        with timer.stage('sankey_chart'):
+            sankey_fig = sankey_chart(data_path, snapshot.key, selection)
+        with timer.stage('plotly_chart.sankey'):
+            st.plotly_chart(sankey_fig)
 
     with col2:
         if selected_potato:
             st.write("**Cost for Each Plant:**")
-            plant_costs = []
-            for plant in ['Pune Plant', 'Channo Plant', 'Kolkata Plant', 'UP Plant']:
-                plant_name = plant.split()[0]
-                consumption_column = f'Consumption_Cost_{plant_name}'
-                if consumption_column in filtered_data.columns:
-                    cost = filtered_data[filtered_data['Potato'] == selected_potato][consumption_column].mean()
-                    plant_costs.append([plant, f"${cost:.2f} per ton"])
-            
-            #st.table(pd.DataFrame(plant_costs, columns=["Plant", "Cost"]).style.set_properties(**{'font-size': '12px'}).hide_index())
-            df = pd.DataFrame(plant_costs, columns=["Plant", "Cost"])
+            with timer.stage('plant_costs'):
+                plant_cost_rows = [[plant_labels[plant], f"${cost:.2f} per ton"]
+                                   for plant, cost in plant_costs(filtered_data, plants).items()]
+
+            #st.table(pd.DataFrame(plant_cost_rows, columns=["Plant", "Cost"]).style.set_properties(**{'font-size': '12px'}).hide_index())
+            df = pd.DataFrame(plant_cost_rows, columns=["Plant", "Cost"])
 
             # Convert DataFrame to HTML and display using st.write()
-            html_table = df.to_html(index=False, border=0, classes='table table-striped')
-            st.write(html_table, unsafe_allow_html=True)
+            with timer.stage('cost_table'):
+                html_table = df.to_html(index=False, border=0, classes='table table-striped')
+                st.write(html_table, unsafe_allow_html=True)
 
     if selected_potato:
-        # Optimized result and insights
-        st.subheader("**Optimized Result and Insight Generation**")
-        selected_plant = st.selectbox("**Select Plant**", options=[''] + ['Pune Plant', 'Channo Plant', 'Kolkata Plant', 'UP Plant'])
-        if selected_plant:
-            selected_plant_name = selected_plant.split()[0]
-            selected_plant_cost = filtered_data[f'Consumption_Cost_{selected_plant_name}'].mean()
-            lowest_cost = min(filtered_data[f'Consumption_Cost_{plant.split()[0]}'].min() for plant in ['Pune Plant', 'Channo Plant', 'Kolkata Plant', 'UP Plant'])
-            destination_plant = next(plant for plant in ['Pune Plant', 'Channo Plant', 'Kolkata Plant', 'UP Plant'] if filtered_data[f'Consumption_Cost_{plant.split()[0]}'].min() == lowest_cost)
-
-            # Fetch transportation costs
-            transportation_cost_selected = filtered_data[get_adjusted_column_name(filtered_data, f'Transportation cost {selected_plant_name}')].mean()
-            transportation_cost_destination = filtered_data[get_adjusted_column_name(filtered_data, f'Transportation cost {destination_plant.split()[0]}')].mean()
-            total_cost_selected = selected_plant_cost + transportation_cost_selected
-            total_cost_destination = lowest_cost + transportation_cost_destination
-
-            # Create insights DataFrame
-            insights_df = pd.DataFrame({
-                'BU': [st.session_state.selected_bu],
-                'Plant to Move': [selected_plant],
-                'Destination Plant': [destination_plant],
-                'Difference ($/Ton)': [total_cost_selected - total_cost_destination]
-            })
-
-            st.write(insights_df.to_html(index=False, border=0, classes='table table-striped'), unsafe_allow_html=True)
-            st.markdown("<br>", unsafe_allow_html=True)
-            if selected_plant == destination_plant:
-                st.write("The selected plant is already the lowest-cost option. No further cost optimization is possible.")
-            else:
-                st.write(f"At **{destination_plant}**, the transportation cost is **${transportation_cost_destination:.2f}**/ton which is comparatively lower than the transportation cost of **{selected_plant}**.")
-                st.write(f"This comprehensive cost analysis highlights the potential savings by considering all aspects of production and transportation costs. In the Business Unit (BU) of **{st.session_state.selected_bu}**, relocating operations from **{selected_plant}** to **{destination_plant}** could lead to significant savings. The savings in cost will amount to the difference between the total costs at these two plants, considering factors like buying rate, plant loss, cold store loss, leno bag and other costs, and transportation cost.")
-                st.write(f"**Final Summary:** Based on the analysis, it is suggested to move the plant from **{selected_plant}** to **{destination_plant}** to achieve a cost savings of **${total_cost_selected - total_cost_destination:.2f}**/ton. This decision is derived from the detailed cost breakdown and comparison of total costs, ensuring a more cost-effective production process.")
-                st.write("Please note that this analysis is based on the provided data and theoretical assumptions. In a real-world scenario, additional factors such as infrastructure, labor costs, regulations, and other variables need to be considered for a comprehensive analysis and accurate predictions regarding plant relocation.")
+        insight_section(selection)
+        allocation_section(selection)
 
 with tab2:
     st.subheader("Buying Rate ($/Ton)")
@@ -217,3 +287,8 @@ with tab4:
 with tab5:
     st.subheader("Leno Bag & Others ($/Ton)")
     st.dataframe(data[['Potato', 'Leno Bag and Others $/Ton']])
+
+with tab6:
+    scenario_section()
+
+profile_panel(timer)